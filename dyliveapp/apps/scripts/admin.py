@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Count, Prefetch
+from django.db.models import Prefetch
 from .models import Script, ScriptTagRelation
 from apps.tags.models import Tag
+from apps.tags.cache import TagCacheManager
 
 class ScriptTagRelationInline(admin.TabularInline):
     """话术标签关联内联管理"""
@@ -32,9 +33,7 @@ class ScriptAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         """优化查询 - 添加统计和预加载"""
-        return super().get_queryset(request).annotate(
-            tag_count=Count('tags')
-        ).select_related(
+        return super().get_queryset(request).select_related(
             'created_by', 'updated_by'
         ).prefetch_related(
             Prefetch('tags', queryset=Tag.objects.only('id', 'tag_name'))
@@ -54,11 +53,6 @@ class ScriptAdmin(admin.ModelAdmin):
         return format_html('<span style="color: red;">✗</span>')
     is_active_icon.short_description = '启用状态'
     
-    def tag_count(self, obj):
-        """显示关联的标签数量"""
-        return getattr(obj, 'tag_count', 0)
-    tag_count.short_description = '标签数量'
-    
     def save_model(self, request, obj, form, change):
         """优化保存 - 使用事务"""
         from django.db import transaction
@@ -84,6 +78,16 @@ class ScriptAdmin(admin.ModelAdmin):
                 instance.updated_by = request.user
                 to_create.append(instance)
         
+        # bulk_update 可能把关联从旧标签移到新标签，写入前先取出旧标签ID
+        affected_tag_ids = set()
+        if to_update:
+            affected_tag_ids.update(
+                ScriptTagRelation.objects.filter(
+                    pk__in=[instance.pk for instance in to_update]
+                ).values_list('tag_id', flat=True)
+            )
+        affected_tag_ids.update(instance.tag_id for instance in instances)
+
         # 批量保存
         if to_create:
             ScriptTagRelation.objects.bulk_create(to_create)
@@ -91,6 +95,11 @@ class ScriptAdmin(admin.ModelAdmin):
             ScriptTagRelation.objects.bulk_update(
                 to_update, ['updated_by', 'tag']
             )
+
+        # 批量写入不触发 post_save 信号，需手动同步标签数量并使标签使用次数缓存失效
+        if to_create or to_update:
+            Script.refresh_tag_count([form.instance.pk])
+            TagCacheManager.invalidate_usage_counts(affected_tag_ids)
     
     fieldsets = [
         ('基本信息', {
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class ScriptsConfig(AppConfig):
+    """话术应用配置"""
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.scripts'
+
+    def ready(self):
+        # 注册信号处理函数
+        from . import signals  # noqa: F401
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+import logging
+from typing import List, Dict, Any, Iterable, Optional
+from .models import Script, ScriptTagRelation, Tag
+
+logger = logging.getLogger(__name__)
+
+# 合法的话术类型，导入时逐行校验使用
+VALID_SCRIPT_TYPES = frozenset(key for key, _ in Script.SCRIPT_TYPES)
+
+
+class ScriptImportProcessor:
+    """
+    话术导入处理器
+    只接收基本类型参数（用户ID、标签ID），便于在请求线程之外（如任务队列）复用
+    """
+
+    @classmethod
+    def process_rows(cls, lines: Iterable[str], user_id: int,
+                     tag_ids: Optional[List[int]] = None, start: int = 2) -> Dict[str, Any]:
+        """逐行解析、校验并创建话术，返回导入结果"""
+        user = get_user_model().objects.get(pk=user_id)
+        tag_ids = tag_ids or []
+        # 一次性预加载启用的标签，避免每行每个标签各查询一次
+        tag_map = {tag.id: tag for tag in Tag.objects.filter(id__in=tag_ids, is_active=True)}
+
+        created_count = 0
+        total_rows = 0
+        error_rows = []
+
+        for row_number, line in enumerate(lines, start=start):
+            total_rows += 1
+            try:
+                # 解析行数据
+                row_data = [col.strip() for col in line.split(',')]
+                if len(row_data) < 3:
+                    error_rows.append({
+                        'row': row_number,
+                        'error': '数据列数不足'
+                    })
+                    continue
+
+                title, content, script_type = row_data[:3]
+
+                # 基本验证
+                if not title or not content or not script_type:
+                    error_rows.append({
+                        'row': row_number,
+                        'error': '标题、内容和话术类型不能为空'
+                    })
+                    continue
+
+                # 验证话术类型
+                if script_type not in VALID_SCRIPT_TYPES:
+                    error_rows.append({
+                        'row': row_number,
+                        'error': f'无效的话术类型：{script_type}'
+                    })
+                    continue
+
+                # 创建话术
+                script = Script.objects.create(
+                    title=title,
+                    content=content,
+                    script_type=script_type,
+                    created_by=user,
+                    updated_by=user
+                )
+
+                # 处理标签
+                for tag_id in tag_ids:
+                    tag = tag_map.get(tag_id)
+                    if tag is None:
+                        logger.warning(f"Tag {tag_id} not found or inactive")
+                        continue
+                    ScriptTagRelation.objects.create(
+                        script=script,
+                        tag=tag,
+                        created_by=user,
+                        updated_by=user
+                    )
+
+                created_count += 1
+                logger.info(f"Successfully created script: {title}")
+
+            except Exception as e:
+                logger.error(f"Error processing row {row_number}: {str(e)}")
+                error_rows.append({
+                    'row': row_number,
+                    'error': str(e)
+                })
+
+        return {
+            'created_count': created_count,
+            'total_rows': total_rows,
+            'errors': error_rows,
+        }
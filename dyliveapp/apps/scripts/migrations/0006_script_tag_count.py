@@ -0,0 +1,31 @@
+# Generated by Django 4.2.19 on 2026-10-16 10:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_tag_count(apps, schema_editor):
+    """根据现有标签关联回填标签数量"""
+    Script = apps.get_model('scripts', 'Script')
+    ScriptTagRelation = apps.get_model('scripts', 'ScriptTagRelation')
+    relation_count = ScriptTagRelation.objects.filter(
+        script_id=OuterRef('pk')
+    ).order_by().values('script_id').annotate(n=Count('id')).values('n')
+    Script.objects.update(tag_count=Coalesce(Subquery(relation_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0005_alter_script_title_alter_script_version_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='script',
+            name='tag_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='标签数量'),
+        ),
+        migrations.RunPython(backfill_tag_count, migrations.RunPython.noop),
+    ]
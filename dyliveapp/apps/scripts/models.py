@@ -1,6 +1,7 @@
 from django.db import models, transaction
 from django.conf import settings
 from apps.tags.models import Tag
+from apps.tags.cache import TagCacheManager
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 import logging
@@ -8,7 +9,8 @@ from django.db.utils import IntegrityError
 import threading
 import time
 from django.db.utils import OperationalError, DatabaseError
-from django.db.models import Max
+from django.db.models import Max, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,7 @@ class Script(models.Model):
     version = models.IntegerField('版本号', default=1, db_index=True)
     is_active = models.BooleanField('是否启用', default=True)
     sort_order = models.IntegerField('排序', default=0)
+    tag_count = models.PositiveIntegerField('标签数量', default=0, editable=False)
     tags = models.ManyToManyField(
         'tags.Tag',
         through='ScriptTagRelation',
@@ -77,6 +80,16 @@ class Script(models.Model):
             logger.error(f"Error saving script: {str(e)}")
             raise ValueError(f"保存话术失败: {str(e)}")
 
+    @classmethod
+    def refresh_tag_count(cls, script_ids):
+        """根据关联表重新统计标签数量（冗余字段，避免列表查询时 GROUP BY）"""
+        relation_count = ScriptTagRelation.objects.filter(
+            script_id=OuterRef('pk')
+        ).order_by().values('script_id').annotate(n=Count('id')).values('n')
+        cls.objects.filter(pk__in=script_ids).update(
+            tag_count=Coalesce(Subquery(relation_count), 0)
+        )
+
     def create_new_version(self, created_by=None):
         """创建话术新版本"""
         thread_name = threading.current_thread().name
@@ -127,6 +140,10 @@ class Script(models.Model):
                             ) for tag in original_tags
                         ]
                         ScriptTagRelation.objects.bulk_create(relations)
+                        # bulk_create 不触发信号，需手动同步标签数量
+                        Script.refresh_tag_count([new_script.pk])
+                        TagCacheManager.invalidate_usage_counts([tag.id for tag in original_tags])
+                        new_script.tag_count = len(relations)
                         logger.info(f"[Thread {thread_name}] 批量创建标签关联完成，共 {len(relations)} 个")
                     
                     logger.info(f"[Thread {thread_name}] 新版本创建完成，版本号：{new_script.version}")
@@ -223,4 +240,4 @@ class ScriptTagRelation(models.Model):
             # 使用select_related减少查询
             tag = Tag.objects.select_related().get(id=self.tag_id)
             if not tag.is_active:
-                raise ValidationError({'tag': '不能关联未启用的标签'})
\ No newline at end of file
+                raise ValidationError({'tag': '不能关联未启用的标签'})
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Script, ScriptTagRelation
 from apps.tags.models import Tag
+from apps.tags.cache import TagCacheManager
 from apps.tags.serializers import TagBriefSerializer
 from apps.users.serializers import UserSerializer
 import re
@@ -113,6 +114,10 @@ class ScriptSerializer(serializers.ModelSerializer):
                         ) for tag_id in tag_ids
                     ]
                     ScriptTagRelation.objects.bulk_create(relations)
+                    # bulk_create 不触发信号，需手动同步标签数量
+                    Script.refresh_tag_count([script.pk])
+                    TagCacheManager.invalidate_usage_counts(tag_ids)
+                    script.tag_count = len(relations)
                     logger.info(f"标签关联创建成功，数量: {len(relations)}")
                     
                 logger.info(f"话术创建完成: ID={script.id}, 标题={script.title}")
@@ -167,6 +172,10 @@ class ScriptSerializer(serializers.ModelSerializer):
                             ) for tag_id in tags_to_add
                         ]
                         ScriptTagRelation.objects.bulk_create(relations)
+                        # bulk_create 不触发信号，需手动同步标签数量
+                        Script.refresh_tag_count([instance.pk])
+                        TagCacheManager.invalidate_usage_counts(tags_to_add)
+                    instance.refresh_from_db(fields=['tag_count'])
             
             return instance
 
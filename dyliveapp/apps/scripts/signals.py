@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Script, ScriptTagRelation
+
+
+@receiver(post_save, sender=ScriptTagRelation)
+@receiver(post_delete, sender=ScriptTagRelation)
+def sync_script_tag_count(sender, instance, **kwargs):
+    """标签关联新增或删除时同步话术的标签数量"""
+    if kwargs.get('created') is False:
+        return
+    Script.refresh_tag_count([instance.script_id])
@@ -6,6 +6,7 @@ from django.utils import timezone
 from datetime import timedelta
 from django.core.exceptions import ValidationError
 from .models import Script, ScriptTagRelation
+from .cache import ScriptCacheManager
 from apps.tags.models import Tag
 from apps.users.models import User
 import logging
@@ -15,6 +16,7 @@ import csv
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.db.utils import IntegrityError
 from django.test.utils import override_settings
+from django.core.cache import cache
 from unittest.mock import patch
 
 logger = logging.getLogger(__name__)
@@ -286,6 +288,23 @@ class ScriptAPITests(APITestCase, BaseTestCase):
         response = self.client.post('/api/scripts/', {})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_retrieve_cached_inactive_script(self):
+        """测试缓存中的未启用话术不会返回给无权限的用户"""
+        cache.clear()
+        script = self.create_script(is_active=False)
+        url = reverse('script-detail', args=[script.id])
+
+        # 管理员查看未启用话术，详情写入缓存
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(ScriptCacheManager.get_cached_script(script.id))
+
+        # 普通用户无查看未启用话术的权限，即使命中缓存也不可见
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_update_script(self):
         """测试更新话术"""
         url = reverse('script-detail', args=[self.script.id])
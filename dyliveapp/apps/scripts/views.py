@@ -3,7 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters import rest_framework as django_filters
-from django.db.models import Count, Q, Max
+from django.db.models import Count, Q, Max, Exists, OuterRef
 from django.db import transaction, DatabaseError
 from django.core.exceptions import ValidationError
 from django.http import Http404, HttpResponse
@@ -18,18 +18,22 @@ import time
 import threading
 from django.db.utils import OperationalError
 from django.utils import timezone
-from collections import Counter
+from django.utils.cache import patch_cache_control
 
-from .models import Script, ScriptTagRelation, Tag
+from .models import Script, ScriptTagRelation
 from .serializers import (
     ScriptSerializer, ScriptBriefSerializer,
     ScriptImportSerializer, ScriptTagRelationSerializer
 )
 from .filters import ScriptFilter
 from .cache import ScriptCacheManager
+from .importer import ScriptImportProcessor
 
 logger = logging.getLogger(__name__)
 
+# 话术类型是静态选项，导入时构建一次即可
+_SCRIPT_TYPES_RESPONSE = dict(Script.SCRIPT_TYPES)
+
 class ScriptViewSet(viewsets.ModelViewSet):
     """
     话术视图集
@@ -43,21 +47,26 @@ class ScriptViewSet(viewsets.ModelViewSet):
     ordering_fields = ['sort_order', 'created_at', 'updated_at']
     ordering = ['-sort_order', '-updated_at']
 
-    def get_object(self):
+    def retrieve(self, request, *args, **kwargs):
         """获取单个对象，优先从缓存获取"""
         script_id = self.kwargs.get('pk')
-        if script_id:
-            # 尝试从缓存获取
+        if script_id and str(script_id).isdigit():
+            # 尝试从缓存获取，命中时直接返回序列化数据，跳过数据库查询；
+            # 缓存为所有用户共享，未启用的话术仅对有权限的用户直接返回，
+            # 其余情况交给 get_object() 按 get_queryset() 的可见范围处理
             cached_data = ScriptCacheManager.get_cached_script(int(script_id))
-            if cached_data:
-                return Script(**cached_data)
+            if cached_data and (
+                cached_data.get('is_active')
+                or request.user.has_perm('scripts.can_view_inactive_scripts')
+            ):
+                return Response(cached_data)
         
         # 缓存未命中，从数据库获取
-        instance = super().get_object()
+        instance = self.get_object()
+        data = self.get_serializer(instance).data
         # 缓存数据
-        if instance:
-            ScriptCacheManager.cache_script(instance.id, self.get_serializer(instance).data)
-        return instance
+        ScriptCacheManager.cache_script(instance.id, data)
+        return Response(data)
 
     def list(self, request, *args, **kwargs):
         """获取列表，优先从缓存获取"""
@@ -83,9 +92,6 @@ class ScriptViewSet(viewsets.ModelViewSet):
         """获取查询集"""
         queryset = super().get_queryset()
         
-        # 添加标签数量统计
-        queryset = queryset.annotate(tag_count=Count('tags'))
-        
         # 如果用户没有查看未启用话术的权限，则只返回已启用的话术
         user = self.request.user
         if not user.has_perm('scripts.can_view_inactive_scripts'):
@@ -156,10 +162,13 @@ class ScriptViewSet(viewsets.ModelViewSet):
             if cached_versions:
                 return Response(cached_versions)
             
-            # 缓存未命中，从数据库获取
+            # 缓存未命中，从数据库获取（走 script_title_latest_idx 索引，只取简要字段）
             versions = Script.objects.filter(
                 title=script.title
-            ).order_by('-version')
+            ).order_by('-version').only(
+                'id', 'title', 'script_type', 'is_active',
+                'version', 'tag_count', 'updated_at'
+            )
             
             serializer = ScriptBriefSerializer(versions, many=True)
             # 缓存版本列表
@@ -191,9 +200,14 @@ class ScriptViewSet(viewsets.ModelViewSet):
             try:
                 with transaction.atomic():
                     # 获取原始话术，使用 select_for_update 加锁
+                    # of=('self',) 只锁定话术行，不锁定关联的用户行；only() 只取创建新版本需要的字段
                     logger.info(f"[Thread {thread_name}] 尝试获取原始话术: ID={pk}")
                     script = Script.objects.select_related('created_by')\
-                        .select_for_update(nowait=False)\
+                        .select_for_update(of=('self',), nowait=False)\
+                        .only(
+                            'id', 'title', 'content', 'script_type', 'version',
+                            'sort_order', 'is_active', 'created_by'
+                        )\
                         .get(pk=pk)
                     logger.info(f"[Thread {thread_name}] 成功获取原始话术: ID={script.id}, Title={script.title}, Version={script.version}")
                     
@@ -246,7 +260,9 @@ class ScriptViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def types(self, request):
         """获取所有话术类型"""
-        return Response(dict(Script.SCRIPT_TYPE_CHOICES))
+        response = Response(_SCRIPT_TYPES_RESPONSE)
+        patch_cache_control(response, public=True, max_age=3600)
+        return response
 
     @action(detail=False, methods=['post'])
     def bulk_delete(self, request):
@@ -442,8 +458,11 @@ class ScriptViewSet(viewsets.ModelViewSet):
             # 标签过滤
             if tag_ids:
                 logger.info(f"应用标签过滤: {tag_ids}")
+                # 使用 EXISTS 半连接代替多表 JOIN，结果不会产生重复行，无需 distinct()
                 for tag_id in tag_ids:
-                    queryset = queryset.filter(tags__id=tag_id)
+                    queryset = queryset.filter(Exists(
+                        ScriptTagRelation.objects.filter(script_id=OuterRef('pk'), tag_id=tag_id)
+                    ))
                 logger.info(f"标签过滤后数量: {queryset.count()}")
             
             # 类型过滤
@@ -459,34 +478,38 @@ class ScriptViewSet(viewsets.ModelViewSet):
                 queryset = queryset.filter(is_active=is_active)
                 logger.info(f"状态过滤后数量: {queryset.count()}")
             
-            # 去重
-            queryset = queryset.distinct()
-            logger.info(f"去重后最终数量: {queryset.count()}")
+            logger.info(f"最终数量: {queryset.count()}")
             
             # 分页
             page = self.paginate_queryset(queryset)
             if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                response_data = self.get_paginated_response(serializer.data).data
+                # 只序列化一次，分页响应本身即可缓存和返回
+                paginated = self.get_paginated_response(ScriptBriefSerializer(page, many=True).data)
                 # 缓存搜索结果
-                ScriptCacheManager.cache_script_list(cache_params, response_data)
+                ScriptCacheManager.cache_script_list(cache_params, paginated.data)
                 logger.info(
                     "返回分页搜索结果: "
-                    f"总数={response_data['count']}, "
-                    f"当前页数量={len(response_data['results'])}, "
-                    f"是否有下一页={'next' in response_data and response_data['next'] is not None}"
+                    f"总数={paginated.data['count']}, "
+                    f"当前页数量={len(paginated.data['results'])}, "
+                    f"是否有下一页={paginated.data.get('next') is not None}"
                 )
-                return Response(response_data)
+                return paginated
             
-            serializer = self.get_serializer(queryset, many=True)
+            serializer = ScriptBriefSerializer(queryset, many=True)
             result_data = serializer.data
             # 缓存搜索结果
             ScriptCacheManager.cache_script_list(cache_params, result_data)
-            logger.info(
-                "返回完整搜索结果: "
-                f"结果数量={len(result_data)}, "
-                f"话术类型统计={Counter(item['script_type'] for item in result_data)}"
-            )
+            if logger.isEnabledFor(logging.INFO):
+                # 类型统计交给数据库 GROUP BY，避免在 Python 中遍历序列化结果
+                type_stats = {
+                    row['script_type']: row['n']
+                    for row in queryset.order_by().values('script_type').annotate(n=Count('id', distinct=True))
+                }
+                logger.info(
+                    "返回完整搜索结果: "
+                    f"结果数量={len(result_data)}, "
+                    f"话术类型统计={type_stats}"
+                )
             return Response(result_data)
             
         except Exception as e:
@@ -577,77 +600,17 @@ class ScriptViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # 处理每一行数据
-            created_count = 0
-            error_rows = []
-            
-            for row_number, line in enumerate(csv_data[1:], start=2):
-                try:
-                    # 解析行数据
-                    row_data = [col.strip() for col in line.split(',')]
-                    if len(row_data) < 3:
-                        error_rows.append({
-                            'row': row_number,
-                            'error': '数据列数不足'
-                        })
-                        continue
-
-                    title, content, script_type = row_data[:3]
-                    
-                    # 基本验证
-                    if not title or not content or not script_type:
-                        error_rows.append({
-                            'row': row_number,
-                            'error': '标题、内容和话术类型不能为空'
-                        })
-                        continue
-
-                    # 验证话术类型
-                    if script_type not in dict(Script.SCRIPT_TYPES):
-                        error_rows.append({
-                            'row': row_number,
-                            'error': f'无效的话术类型：{script_type}'
-                        })
-                        continue
-
-                    # 创建话术
-                    script = Script.objects.create(
-                        title=title,
-                        content=content,
-                        script_type=script_type,
-                        created_by=request.user,
-                        updated_by=request.user
-                    )
-
-                    # 处理标签
-                    if tag_ids:
-                        for tag_id in tag_ids:
-                            try:
-                                tag = Tag.objects.get(id=tag_id, is_active=True)
-                                ScriptTagRelation.objects.create(
-                                    script=script,
-                                    tag=tag,
-                                    created_by=request.user,
-                                    updated_by=request.user
-                                )
-                            except Tag.DoesNotExist:
-                                logger.warning(f"Tag {tag_id} not found or inactive")
-                                continue
-
-                    created_count += 1
-                    logger.info(f"Successfully created script: {title}")
-
-                except Exception as e:
-                    logger.error(f"Error processing row {row_number}: {str(e)}")
-                    error_rows.append({
-                        'row': row_number,
-                        'error': str(e)
-                    })
+            # 逐行解析并创建话术
+            import_result = ScriptImportProcessor.process_rows(
+                csv_data[1:], user_id=request.user.id, tag_ids=tag_ids
+            )
+            created_count = import_result['created_count']
+            error_rows = import_result['errors']
 
             # 返回导入结果
             result = {
                 'created_count': created_count,
-                'total_rows': len(csv_data) - 1,
+                'total_rows': import_result['total_rows'],
                 'success': created_count > 0
             }
             
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class TagsConfig(AppConfig):
+    """标签应用配置"""
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.tags'
+    verbose_name = '话术标签'
+
+    def ready(self):
+        # 注册信号处理函数
+        from . import signals  # noqa: F401
@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.db.models import Count
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class TagCacheManager:
+    """标签缓存管理器"""
+
+    # 缓存键前缀
+    USAGE_COUNT_PREFIX = "tag:usage_count:"
+    TREE_PREFIX = "tag:tree:"
+
+    # 缓存过期时间（秒）
+    # 使用次数缓存的失效只作用于当前进程的 LocMemCache，多进程部署时
+    # 其他进程最多会在该时长内返回旧的使用次数，需要即时一致时应改用共享缓存
+    USAGE_COUNT_TIMEOUT = 300  # 5分钟
+    TREE_TIMEOUT = 300  # 5分钟
+
+    @classmethod
+    def get_usage_count_cache_key(cls, tag_id: int) -> str:
+        """获取标签使用次数缓存键"""
+        return f"{cls.USAGE_COUNT_PREFIX}{tag_id}"
+
+    @classmethod
+    def get_usage_counts(cls, tag_ids: Iterable[int]) -> Dict[int, int]:
+        """批量获取标签使用次数：一次读取缓存，未命中的标签一次聚合查询后回填"""
+        from apps.scripts.models import ScriptTagRelation
+
+        tag_ids = list(dict.fromkeys(tag_ids))
+        if not tag_ids:
+            return {}
+
+        keys = {cls.get_usage_count_cache_key(tag_id): tag_id for tag_id in tag_ids}
+        try:
+            cached = cache.get_many(list(keys))
+        except Exception as e:
+            logger.error("Error getting cached tag usage counts: %s", e)
+            cached = {}
+        counts = {keys[key]: value for key, value in cached.items()}
+
+        missing_ids = [tag_id for tag_id in tag_ids if tag_id not in counts]
+        if missing_ids:
+            rows = ScriptTagRelation.objects.filter(tag_id__in=missing_ids).order_by().values(
+                'tag_id'
+            ).annotate(n=Count('id'))
+            fresh = {tag_id: 0 for tag_id in missing_ids}
+            fresh.update({row['tag_id']: row['n'] for row in rows})
+            counts.update(fresh)
+            try:
+                cache.set_many(
+                    {cls.get_usage_count_cache_key(tag_id): n for tag_id, n in fresh.items()},
+                    cls.USAGE_COUNT_TIMEOUT
+                )
+            except Exception as e:
+                logger.error("Error caching tag usage counts: %s", e)
+
+        return counts
+
+    @classmethod
+    def invalidate_usage_counts(cls, tag_ids: Iterable[int]) -> None:
+        """使标签使用次数缓存失效"""
+        # 参数可能是生成器，先物化，避免删除缓存时被耗尽后日志只能打印出空的迭代器
+        tag_ids = list(tag_ids)
+        try:
+            cache.delete_many([cls.get_usage_count_cache_key(tag_id) for tag_id in tag_ids])
+            logger.debug("Invalidated tag usage count cache: %s", tag_ids)
+        except Exception as e:
+            logger.error("Error invalidating tag usage count cache: %s", e)
+
+    @classmethod
+    def get_tree_cache_key(cls, version: str, include_inactive: bool) -> str:
+        """获取标签树缓存键，版本号变化（标签新增、修改、删除）后旧缓存自然失效"""
+        return f"{cls.TREE_PREFIX}{version}:{int(include_inactive)}"
+
+    @classmethod
+    def get_cached_tree(cls, version: str, include_inactive: bool) -> Optional[List[Dict[str, Any]]]:
+        """获取缓存的标签树"""
+        try:
+            cache_key = cls.get_tree_cache_key(version, include_inactive)
+            data = cache.get(cache_key)
+            if data is not None:
+                logger.debug("Cache hit for tag tree: %s", cache_key)
+            return data
+        except Exception as e:
+            logger.error("Error getting cached tag tree: %s", e)
+            return None
+
+    @classmethod
+    def cache_tree(cls, version: str, include_inactive: bool, data: List[Dict[str, Any]]) -> None:
+        """缓存标签树"""
+        try:
+            cache_key = cls.get_tree_cache_key(version, include_inactive)
+            cache.set(cache_key, data, cls.TREE_TIMEOUT)
+            logger.debug("Cached tag tree: %s", cache_key)
+        except Exception as e:
+            logger.error("Error caching tag tree: %s", e)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.19 on 2026-10-16 10:30
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tags', '0002_alter_tag_options_tag_created_by_tag_description_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(django.db.models.functions.text.Upper('tag_name'), name='tag_name_upper_idx'),
+        ),
+    ]
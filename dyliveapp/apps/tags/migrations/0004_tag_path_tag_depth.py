@@ -0,0 +1,47 @@
+# Generated by Django 4.2.19 on 2026-10-16 11:00
+
+from django.db import migrations, models
+
+
+def backfill_tag_paths(apps, schema_editor):
+    """根据现有父子关系回填层级路径和深度"""
+    Tag = apps.get_model('tags', 'Tag')
+    parents = dict(Tag.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def build(tag_id, seen=()):
+        if tag_id in paths:
+            return paths[tag_id]
+        parent_id = parents.get(tag_id)
+        if parent_id is None or parent_id not in parents or parent_id in seen:
+            paths[tag_id] = (f"/{tag_id}", 0)
+        else:
+            parent_path, parent_depth = build(parent_id, seen + (tag_id,))
+            paths[tag_id] = (f"{parent_path}/{tag_id}", parent_depth + 1)
+        return paths[tag_id]
+
+    tags = list(Tag.objects.only('id', 'path', 'depth'))
+    for tag in tags:
+        tag.path, tag.depth = build(tag.id)
+    Tag.objects.bulk_update(tags, ['path', 'depth'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tags', '0003_tag_tag_name_upper_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='从顶级标签到当前标签的ID路径，如 /1/17/42', max_length=512, verbose_name='层级路径'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='顶级标签为0', verbose_name='层级深度'),
+        ),
+        migrations.RunPython(backfill_tag_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tags', '0004_tag_path_tag_depth'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['updated_at'], name='tag_updated_at_idx'),
+        ),
+    ]
@@ -1,16 +1,17 @@
 from django.db import models, transaction
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 import logging
 from django.db.models import Q
 from django.db.models import Count
 from django.db.models import OuterRef
-from django.db.models import Subquery
 from django.db.models import Case
 from django.db.models import When
 from django.db.models import Value
 from django.db.models import CharField
 from django.db.models import F
 from django.db.models import Prefetch
+from django.db.models.functions import Cast, Concat, Substr, Upper
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +50,21 @@ class Tag(models.Model):
         related_name='children',
         help_text='父标签，用于构建标签层级关系'
     )
+    path = models.CharField(
+        '层级路径',
+        max_length=512,
+        db_index=True,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='从顶级标签到当前标签的ID路径，如 /1/17/42'
+    )
+    depth = models.PositiveSmallIntegerField(
+        '层级深度',
+        default=0,
+        editable=False,
+        help_text='顶级标签为0'
+    )
     created_by = models.ForeignKey(
         'users.User',
         verbose_name='创建者',
@@ -84,12 +100,34 @@ class Tag(models.Model):
             models.Index(fields=['tag_name'], name='tag_name_idx'),
             models.Index(fields=['sort_order'], name='sort_order_idx'),
             models.Index(fields=['is_active'], name='is_active_idx'),
+            # 不区分大小写的名称唯一性校验使用
+            models.Index(Upper('tag_name'), name='tag_name_upper_idx'),
+            # 标签树缓存版本号（最近更新时间）使用
+            models.Index(fields=['updated_at'], name='tag_updated_at_idx'),
         ]
         permissions = [
             ("can_manage_tags", "Can manage tags"),
             ("can_view_inactive_tags", "Can view inactive tags"),
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 记录加载时的校验相关字段，用 __dict__ 读取避免触发延迟字段查询
+        self._remember_validated_fields()
+
+    def _remember_validated_fields(self):
+        """记录 clean() 需要校验的字段的当前值"""
+        self._original_parent_id = self.__dict__.get('parent_id')
+        self._original_tag_name = self.__dict__.get('tag_name')
+
+    def _validated_fields_changed(self):
+        """新建或名称、父标签发生变化时才需要重新校验"""
+        return (
+            self._state.adding
+            or self.parent_id != self._original_parent_id
+            or self.tag_name != self._original_tag_name
+        )
+
     def __str__(self):
         """返回标签的字符串表示"""
         if self.parent:
@@ -107,23 +145,25 @@ class Tag(models.Model):
             errors['tag_name'] = '标签名称不能为空'
         
         # 验证父标签关系
-        if self.parent:
-            # 检查父标签是否存在
-            if not Tag.objects.filter(id=self.parent.id).exists():
+        if self.parent_id:
+            # 一次查询同时确认父标签是否存在及是否启用（None 表示不存在）
+            parent_is_active = Tag.objects.filter(id=self.parent_id).values_list(
+                'is_active', flat=True
+            ).first()
+            if parent_is_active is None:
                 errors['parent'] = '父标签不存在'
             
             # 检查是否形成循环引用
             if self.pk:
-                if self.parent.pk == self.pk:
+                if self.parent_id == self.pk:
                     errors['parent'] = '标签不能将自己设为父标签'
                 
                 # 检查是否将一个子标签设为父标签
-                children_pks = set(self.get_all_children().values_list('pk', flat=True))
-                if self.parent.pk in children_pks:
+                if Tag.is_descendant_of(self.parent_id, self.pk):
                     errors['parent'] = '不能将子标签设为父标签'
             
             # 检查父标签是否已启用
-            if not self.parent.is_active:
+            if parent_is_active is False:
                 errors['parent'] = '不能选择未启用的标签作为父标签'
 
         if errors:
@@ -138,11 +178,17 @@ class Tag(models.Model):
             if self.tag_name:
                 self.tag_name = self.tag_name.strip()
             
-            # 数据验证
-            self.clean()
+            # 数据验证：只在名称或父标签变化时执行，避免无关更新重复查询
+            parent_changed = self._state.adding or self.parent_id != self._original_parent_id
+            if self._validated_fields_changed():
+                self.clean()
             
             # 保存标签
             super().save(*args, **kwargs)
+            if parent_changed or not self.path:
+                self._update_path()
+            self._remember_validated_fields()
+            self.clear_tree_cache()
             logger.info(f"Tag saved successfully: {self.tag_name}")
             
         except ValidationError as e:
@@ -152,9 +198,74 @@ class Tag(models.Model):
             logger.error(f"Error saving tag {self.tag_name}: {str(e)}")
             raise ValueError(f"保存标签失败: {str(e)}")
 
+    def _update_path(self):
+        """
+        根据父标签计算并保存层级路径；标签被移动时同步改写所有子孙标签的路径
+        """
+        old_path, old_depth = self.path, self.depth
+        if self.parent_id:
+            parent_path, parent_depth = Tag.objects.filter(pk=self.parent_id).values_list(
+                'path', 'depth'
+            ).get()
+            new_path, new_depth = f"{parent_path}/{self.pk}", parent_depth + 1
+        else:
+            new_path, new_depth = f"/{self.pk}", 0
+        
+        if new_path == old_path and new_depth == old_depth:
+            return
+        
+        Tag.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        if old_path:
+            # 子孙标签路径前缀整体替换，一条 UPDATE 完成
+            Tag.objects.filter(path__startswith=f"{old_path}/").update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (new_depth - old_depth)
+            )
+        self.path, self.depth = new_path, new_depth
+
+    @classmethod
+    def is_descendant_of(cls, child_id, root_id):
+        """
+        判断 child_id 是否为 root_id 的子孙标签，按层级路径前缀匹配
+        
+        Args:
+            child_id: 待检查的标签ID
+            root_id: 祖先标签ID
+            
+        Returns:
+            bool: 是子孙标签时返回 True
+        """
+        root_path = cls.objects.filter(pk=root_id).values_list('path', flat=True).first()
+        if not root_path:
+            # 祖先标签不存在或路径尚未补齐，前缀为空会匹配所有标签
+            return False
+        return cls.objects.filter(pk=child_id, path__startswith=f"{root_path}/").exists()
+
+    @classmethod
+    def sync_root_paths(cls, queryset=None):
+        """
+        为批量插入（未经过 save()）的顶级标签补齐层级路径，一条 UPDATE 完成
+        
+        Args:
+            queryset: 限定处理范围的查询集，默认处理全部标签
+            
+        Returns:
+            int: 补齐路径的标签数量
+        """
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.filter(parent__isnull=True, path='').update(
+            path=Concat(Value('/'), Cast('pk', output_field=CharField())),
+            depth=0
+        )
+
+    @property
+    def ancestor_ids(self):
+        """从层级路径解析出祖先标签ID，从顶级标签开始"""
+        return [int(pk) for pk in self.path.strip('/').split('/')[:-1] if pk]
+
     def get_all_children(self, include_self=False):
         """
-        获取所有子标签，使用递归查询优化性能
+        获取所有子标签，基于层级路径前缀匹配，走 path 索引
         
         Args:
             include_self: 是否包含自己
@@ -162,26 +273,18 @@ class Tag(models.Model):
         Returns:
             QuerySet: 包含所有子标签的查询集
         """
-        queryset = Tag.objects.none()
-        if include_self:
-            queryset = Tag.objects.filter(pk=self.pk)
-        
-        # 使用递归CTE查询获取所有子标签
-        children = Tag.objects.raw("""
-            WITH RECURSIVE tag_tree AS (
-                SELECT * FROM tags_tag WHERE parent_id = %s
-                UNION ALL
-                SELECT t.* FROM tags_tag t
-                INNER JOIN tag_tree tt ON t.parent_id = tt.id
-            )
-            SELECT * FROM tag_tree
-        """, [self.pk])
+        if not self.path:
+            # 尚未保存的标签没有子标签
+            return Tag.objects.filter(pk=self.pk) if include_self and self.pk else Tag.objects.none()
         
-        return queryset | Tag.objects.filter(pk__in=[child.pk for child in children])
+        condition = Q(path__startswith=f"{self.path}/")
+        if include_self:
+            condition |= Q(pk=self.pk)
+        return Tag.objects.filter(condition)
 
     def get_ancestors(self, include_self=False):
         """
-        获取所有祖先标签，使用递归查询优化性能
+        获取所有祖先标签，根据层级路径中的ID一次查询
         
         Args:
             include_self: 是否包含自己
@@ -189,24 +292,29 @@ class Tag(models.Model):
         Returns:
             list: 包含所有祖先标签的列表，从顶级标签开始
         """
-        ancestors = []
-        if include_self:
-            ancestors.append(self)
+        # 顶级标签没有祖先，无需查询
+        if not self.parent_id:
+            return [self] if include_self else []
         
-        # 使用递归CTE查询获取所有祖先标签
-        ancestors_query = Tag.objects.raw("""
-            WITH RECURSIVE tag_tree AS (
-                SELECT * FROM tags_tag WHERE id = %s
-                UNION ALL
-                SELECT t.* FROM tags_tag t
-                INNER JOIN tag_tree tt ON t.id = tt.parent_id
-            )
-            SELECT * FROM tag_tree WHERE id != %s
-            ORDER BY created_at DESC
-        """, [self.parent_id if self.parent_id else 0, self.pk])
+        # 同一实例重复调用时直接复用结果（父标签变化后自动失效）
+        cached = getattr(self, '_ancestors_cache', None)
+        if cached is not None and cached[0] == self.parent_id:
+            ancestors = list(cached[1])
+            if include_self:
+                ancestors.append(self)
+            return ancestors
+        
+        ancestors = list(Tag.objects.filter(pk__in=self.ancestor_ids).order_by('depth'))
+        self._ancestors_cache = (self.parent_id, ancestors)
         
-        ancestors.extend(list(ancestors_query))
-        return list(reversed(ancestors))
+        ancestors = list(ancestors)
+        if include_self:
+            ancestors.append(self)
+        return ancestors
+
+    def clear_tree_cache(self):
+        """清除实例上缓存的层级查询结果"""
+        self._ancestors_cache = None
 
     def get_siblings(self, include_self=False):
         """
@@ -218,25 +326,36 @@ class Tag(models.Model):
         Returns:
             QuerySet: 包含所有同级标签的查询集
         """
-        queryset = Tag.objects.filter(parent=self.parent)
+        # 直接按外键ID过滤，避免为取父标签主键而加载父标签
+        queryset = Tag.objects.filter(parent_id=self.parent_id)
         if not include_self:
             queryset = queryset.exclude(pk=self.pk)
         return queryset.order_by('-sort_order', 'tag_name')
 
-    def deactivate(self):
+    def deactivate(self, user=None):
         """
-        停用标签及其所有子标签，使用事务确保原子性
+        停用标签及其所有子标签，单条语句天然具备原子性
+        
+        Args:
+            user: 执行停用的用户，提供时一并记录为更新人
+            
+        Returns:
+            int: 被停用的标签数量（包含自己）
         """
         try:
-            with transaction.atomic():
-                self.is_active = False
-                self.save()
-                
-                # 停用所有子标签
-                children = self.get_all_children()
-                children.update(is_active=False)
-                
-                logger.info(f"Tag {self.tag_name} and its children have been deactivated")
+            # 自身和所有子标签通过一条 UPDATE（按层级路径前缀匹配）一起停用。
+            # 标签没有依赖 save()/信号的级联逻辑，因此无需逐个加载后 bulk_update
+            changes = {'is_active': False, 'updated_at': timezone.now()}
+            if user is not None:
+                changes['updated_by'] = user
+            updated = self.get_all_children(include_self=True).update(**changes)
+            self.is_active = False
+            if user is not None:
+                self.updated_by = user
+            self.clear_tree_cache()
+            
+            logger.info(f"Tag {self.tag_name} and its children have been deactivated")
+            return updated
         except Exception as e:
             logger.error(f"Error deactivating tag {self.tag_name}: {str(e)}")
             raise ValueError(f"停用标签失败: {str(e)}")
@@ -247,13 +366,18 @@ class Tag(models.Model):
         """
         try:
             with transaction.atomic():
-                # 如果有父标签且未启用，则先启用父标签
-                if self.parent and not self.parent.is_active:
-                    self.parent.activate()
-                
+                # 一次取出祖先链，连同自己用一条 UPDATE 启用，不再逐级递归保存
+                ancestors = self.get_ancestors()
+                ids = [self.pk] + [ancestor.pk for ancestor in ancestors]
+                Tag.objects.filter(pk__in=ids, is_active=False).update(
+                    is_active=True,
+                    updated_at=timezone.now()
+                )
+                for ancestor in ancestors:
+                    ancestor.is_active = True
                 self.is_active = True
-                self.save()
                 logger.info(f"Tag {self.tag_name} has been activated")
         except Exception as e:
             logger.error(f"Error activating tag {self.tag_name}: {str(e)}")
-            raise ValueError(f"启用标签失败: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"启用标签失败: {str(e)}")
+
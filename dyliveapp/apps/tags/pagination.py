@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TagCursorPagination(CursorPagination):
+    """
+    标签游标分页
+    按 (sort_order, id) 游标翻页，不执行 COUNT(*)，翻页深度不影响查询性能
+    """
+    ordering = ('sort_order', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
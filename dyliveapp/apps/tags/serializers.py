@@ -1,10 +1,53 @@
 from rest_framework import serializers
+from django.db import models
 from .models import Tag
-from apps.scripts.models import ScriptTagRelation
+from .cache import TagCacheManager
 import logging
+from collections import Counter, defaultdict
+from django.db.models.functions import Upper
 
 logger = logging.getLogger(__name__)
 
+def _known_usage_count(tag):
+    """
+    不查询数据库即可得到的使用次数：聚合注解优先，其次是已预加载的关联行
+    都没有时返回 None
+    """
+    usage_count = getattr(tag, 'usage_count', None)
+    if usage_count is not None:
+        return usage_count
+    prefetched = getattr(tag, '_prefetched_objects_cache', {})
+    if 'script_tag_relations' in prefetched:
+        return len(prefetched['script_tag_relations'])
+    return None
+
+class TagListSerializer(serializers.ListSerializer):
+    """标签批量序列化器，一次查询校验所有标签名称是否重复"""
+
+    def validate(self, attrs):
+        names = [item['tag_name'].upper() for item in attrs if item.get('tag_name')]
+        if not names:
+            return attrs
+        
+        # 提交的数据内部重复
+        duplicated = {name for name, count in Counter(names).items() if count > 1}
+        
+        # 与已有标签重复（按 UPPER(tag_name) 比较，走表达式索引）
+        queryset = Tag.objects.annotate(tag_name_upper=Upper('tag_name')).filter(
+            tag_name_upper__in=set(names)
+        )
+        if self.instance is not None:
+            queryset = queryset.exclude(id__in=[tag.id for tag in self.instance])
+        duplicated.update(queryset.values_list('tag_name_upper', flat=True))
+        
+        if duplicated:
+            duplicated_names = [
+                item['tag_name'] for item in attrs
+                if item.get('tag_name') and item['tag_name'].upper() in duplicated
+            ]
+            raise serializers.ValidationError(f"标签名称已存在：{', '.join(dict.fromkeys(duplicated_names))}")
+        return attrs
+
 class TagSerializer(serializers.ModelSerializer):
     """标签序列化器"""
     usage_count = serializers.SerializerMethodField()
@@ -20,6 +63,7 @@ class TagSerializer(serializers.ModelSerializer):
             'created_by', 'updated_by', 'created_at', 'updated_at', 'usage_count'
         ]
         read_only_fields = ['created_by', 'updated_by', 'created_at', 'updated_at', 'usage_count']
+        list_serializer_class = TagListSerializer
 
     def validate_tag_name(self, value):
         """验证标签名称"""
@@ -27,23 +71,26 @@ class TagSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("标签名称不能为空")
         
         value = value.strip()
+        if isinstance(self.parent, serializers.ListSerializer):
+            # 批量提交时由 TagListSerializer 一次查询统一校验
+            return value
+        
         # 检查标签名称是否已存在（不区分大小写）
-        if self.instance is None:  # 创建新标签时
-            if Tag.objects.filter(tag_name__iexact=value).exists():
-                raise serializers.ValidationError("标签名称已存在")
-        else:  # 更新标签时
-            if Tag.objects.filter(tag_name__iexact=value).exclude(id=self.instance.id).exists():
-                raise serializers.ValidationError("标签名称已存在")
+        # 按 UPPER(tag_name) 比较，与 tag_name_upper_idx 表达式索引一致，可走索引
+        queryset = Tag.objects.annotate(tag_name_upper=Upper('tag_name')).filter(
+            tag_name_upper=value.upper()
+        )
+        if self.instance is not None:  # 更新标签时排除自身
+            queryset = queryset.exclude(id=self.instance.id)
+        if queryset.exists():
+            raise serializers.ValidationError("标签名称已存在")
         
         return value
 
     def validate_parent(self, value):
         """验证父标签"""
         if value:
-            # 检查父标签是否存在
-            if not Tag.objects.filter(id=value.id).exists():
-                raise serializers.ValidationError("父标签不存在")
-            
+            # 父标签是否存在已由 PrimaryKeyRelatedField 在解析时校验
             # 检查父标签是否已启用
             if not value.is_active:
                 raise serializers.ValidationError("不能选择未启用的标签作为父标签")
@@ -54,8 +101,7 @@ class TagSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError("标签不能将自己设为父标签")
                 
                 # 检查是否将一个子标签设为父标签
-                children_pks = set(self.instance.get_all_children().values_list('pk', flat=True))
-                if value.pk in children_pks:
+                if Tag.is_descendant_of(value.pk, self.instance.pk):
                     raise serializers.ValidationError("不能将子标签设为父标签")
         
         return value
@@ -72,13 +118,20 @@ class TagSerializer(serializers.ModelSerializer):
         return data
 
     def get_usage_count(self, obj):
-        """获取标签使用次数"""
-        return getattr(obj, 'usage_count', ScriptTagRelation.objects.filter(tag=obj).count())
+        """获取标签使用次数，优先使用聚合注解或已预加载的关联"""
+        usage_count = _known_usage_count(obj)
+        if usage_count is None:
+            # 未注解时（如嵌套在话术序列化器中）从缓存读取
+            usage_count = TagCacheManager.get_usage_counts([obj.id])[obj.id]
+        return usage_count
 
     def get_children(self, obj):
         """获取子标签"""
-        # 优化查询，只获取必要的字段
-        children = obj.children.all().only('id', 'tag_name')
+        # 直接使用视图预加载的子标签，避免重新查询
+        children = getattr(obj, 'cached_children', None)
+        if children is None:
+            # 新建/未经视图预加载的实例才单独查询
+            children = obj.children.only('id', 'tag_name').order_by('-sort_order', 'tag_name')
         return TagBriefSerializer(children, many=True).data
 
     def get_parent_name(self, obj):
@@ -86,9 +139,22 @@ class TagSerializer(serializers.ModelSerializer):
         return obj.parent.tag_name if obj.parent else None
 
     def get_ancestors(self, obj):
-        """获取祖先标签"""
-        ancestors = obj.get_ancestors()
-        return TagBriefSerializer(ancestors, many=True).data
+        """获取祖先标签，沿预加载的父标签链向上查找，不再执行递归查询"""
+        # 同一次请求内按标签ID缓存序列化结果
+        ancestors_cache = self.context.setdefault('_ancestors_cache', {})
+        if obj.pk in ancestors_cache:
+            return ancestors_cache[obj.pk]
+        
+        ancestors = []
+        seen = {obj.pk}
+        parent = obj.parent
+        while parent is not None and parent.pk not in seen:
+            ancestors.append(parent)
+            seen.add(parent.pk)
+            parent = parent.parent
+        ancestors.reverse()
+        ancestors_cache[obj.pk] = TagBriefSerializer(ancestors, many=True).data
+        return ancestors_cache[obj.pk]
 
     def create(self, validated_data):
         """创建标签"""
@@ -119,6 +185,19 @@ class TagSerializer(serializers.ModelSerializer):
             logger.error(f"Error updating tag: {str(e)}")
             raise serializers.ValidationError(f"更新标签失败: {str(e)}")
 
+class TagBriefListSerializer(serializers.ListSerializer):
+    """标签简要信息列表序列化器，未注解使用次数时批量从缓存读取"""
+
+    def to_representation(self, data):
+        tags = list(data.all() if isinstance(data, models.Manager) else data)
+        missing_ids = [tag.id for tag in tags if _known_usage_count(tag) is None]
+        if missing_ids:
+            usage_counts = TagCacheManager.get_usage_counts(missing_ids)
+            for tag in tags:
+                if _known_usage_count(tag) is None:
+                    tag.usage_count = usage_counts[tag.id]
+        return super().to_representation(tags)
+
 class TagBriefSerializer(serializers.ModelSerializer):
     """标签简要信息序列化器（用于列表展示）"""
     usage_count = serializers.SerializerMethodField()
@@ -126,10 +205,15 @@ class TagBriefSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ['id', 'tag_name', 'usage_count']
+        list_serializer_class = TagBriefListSerializer
 
     def get_usage_count(self, obj):
-        """获取标签使用次数"""
-        return getattr(obj, 'usage_count', ScriptTagRelation.objects.filter(tag=obj).count())
+        """获取标签使用次数，优先使用聚合注解或已预加载的关联"""
+        usage_count = _known_usage_count(obj)
+        if usage_count is None:
+            # 未注解时（如嵌套在话术序列化器中）从缓存读取
+            usage_count = TagCacheManager.get_usage_counts([obj.id])[obj.id]
+        return usage_count
 
 class TagTreeSerializer(serializers.ModelSerializer):
     """标签树形结构序列化器"""
@@ -139,8 +223,20 @@ class TagTreeSerializer(serializers.ModelSerializer):
         model = Tag
         fields = ['id', 'tag_name', 'description', 'is_active', 'sort_order', 'children']
         
+    def to_representation(self, instance):
+        """首次序列化时一次查询加载全部标签，在内存中构建 parent_id -> 子标签 的映射"""
+        if '_children_map' not in self.context:
+            children_map = defaultdict(list)
+            all_tags = Tag.objects.only(
+                'id', 'tag_name', 'description', 'is_active', 'sort_order', 'parent_id'
+            ).order_by('-sort_order', 'tag_name')
+            for tag in all_tags:
+                if tag.parent_id is not None:
+                    children_map[tag.parent_id].append(tag)
+            self.context['_children_map'] = children_map
+        return super().to_representation(instance)
+        
     def get_children(self, obj):
-        """递归获取子标签"""
-        # 优化查询，使用select_related减少数据库查询
-        children = obj.children.all().select_related('parent').order_by('-sort_order', 'tag_name')
-        return TagTreeSerializer(children, many=True).data
+        """递归获取子标签，从内存映射中查找，不再逐节点查询"""
+        children = self.context['_children_map'].get(obj.id, [])
+        return TagTreeSerializer(children, many=True, context=self.context).data
@@ -0,0 +1,34 @@
+from django.db.models import F
+from django.db.models.functions import Substr
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from apps.scripts.models import ScriptTagRelation
+from .cache import TagCacheManager
+from .models import Tag
+
+
+@receiver(post_save, sender=ScriptTagRelation)
+@receiver(post_delete, sender=ScriptTagRelation)
+def invalidate_tag_usage_count(sender, instance, **kwargs):
+    """标签关联新增或删除时使该标签的使用次数缓存失效"""
+    if kwargs.get('created') is False:
+        return
+    TagCacheManager.invalidate_usage_counts([instance.tag_id])
+
+
+@receiver(pre_delete, sender=Tag)
+def rebase_orphaned_tag_paths(sender, instance, **kwargs):
+    """
+    父标签删除后子标签的 parent 被置空，同步截掉子孙标签路径中已删除的前缀
+
+    路径从数据库重新读取：内存中的实例可能在标签移动或祖先被同批删除后已过期。
+    pre_delete 与删除处于同一事务，删除失败时路径改写一并回滚。
+    """
+    current = Tag.objects.filter(pk=instance.pk).values_list('path', 'depth').first()
+    if current is None or not current[0]:
+        return
+    path, depth = current
+    Tag.objects.filter(path__startswith=f"{path}/").update(
+        path=Substr('path', len(path) + 1),
+        depth=F('depth') - (depth + 1)
+    )
@@ -1,9 +1,10 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import SimpleRouter
 from .views import TagViewSet
 
-# 创建路由器
-router = DefaultRouter()
+# 创建路由器：标签路由与话术路由共用 api/ 前缀，API 根视图和格式后缀路由用不到，
+# 使用 SimpleRouter 减少需要匹配的 URL 模式
+router = SimpleRouter()
 router.register(r'tags', TagViewSet)
 
 # URL patterns
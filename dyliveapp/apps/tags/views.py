@@ -3,17 +3,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters import rest_framework as django_filters
-from django.db.models import Count, Q
+from django.db.models import Count, Exists, Max, OuterRef, Q, Prefetch, Sum
+from django.db.models.functions import Coalesce, Upper
 from django.db import transaction, IntegrityError
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 import logging
-import traceback
+from collections import defaultdict
 from rest_framework.exceptions import ValidationError
 
 from .models import Tag
+from .cache import TagCacheManager
+from .pagination import TagCursorPagination
 from .serializers import TagSerializer, TagBriefSerializer, TagTreeSerializer
 from apps.scripts.serializers import ScriptBriefSerializer
 from apps.scripts.models import ScriptTagRelation
@@ -40,19 +44,31 @@ class TagViewSet(viewsets.ModelViewSet):
     serializer_class = TagSerializer
     filterset_class = TagFilter
     search_fields = ['tag_name', 'description']
-    ordering_fields = ['sort_order', 'tag_name', 'created_at']
-    ordering = ['sort_order', 'tag_name']
     permission_classes = [IsAuthenticated]
+    pagination_class = TagCursorPagination
+    # 使用完整 TagSerializer 的操作，需要预加载父标签链和子标签
+    DETAIL_ACTIONS = ('retrieve', 'update', 'partial_update')
+    # 预加载的父标签层级深度，超出部分按需查询
+    PARENT_PREFETCH_DEPTH = 5
+    # 自行获取关联话术的操作，get_object 无需聚合使用次数
+    UNANNOTATED_ACTIONS = ('usage',)
+    # 搜索建议最多返回的条数
+    SUGGESTION_LIMIT = 10
 
     def get_permissions(self):
         """
         根据不同的操作返回不同的权限
         """
-        logger.debug(f"Action: {self.action}, Permission classes: {self.permission_classes}")
+        logger.debug("Action: %s, Permission classes: %s", self.action, self.permission_classes)
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'activate', 'deactivate']:
             self.permission_classes = [IsAdminUser]
         return super().get_permissions()
 
+    @cached_property
+    def can_view_inactive(self):
+        """当前用户能否查看停用标签；视图实例按请求创建，权限在一次请求内只判断一次"""
+        return self.request.user.has_perm('tags.can_view_inactive_tags')
+
     def get_queryset(self):
         """
         获取查询集
@@ -60,13 +76,40 @@ class TagViewSet(viewsets.ModelViewSet):
         """
         try:
             queryset = super().get_queryset()
+            if self.action not in self.UNANNOTATED_ACTIONS:
+                # 一次聚合得到使用次数，避免序列化时逐个标签统计
+                queryset = queryset.annotate(
+                    usage_count=Count('script_tag_relations', distinct=True)
+                )
             user = self.request.user
             
-            if not user.has_perm('tags.can_view_inactive_tags'):
+            if not self.can_view_inactive:
                 queryset = queryset.filter(is_active=True)
-                logger.debug(f"User {user.name} can only view active tags")
+                logger.debug("User %s can only view active tags", user.name)
             else:
-                logger.debug(f"User {user.name} can view all tags")
+                logger.debug("User %s can view all tags", user.name)
+                
+            if self.action in self.DETAIL_ACTIONS:
+                # TagSerializer 会访问父标签链和子标签，预先加载避免逐个查询
+                queryset = queryset.select_related(
+                    '__'.join(['parent'] * self.PARENT_PREFETCH_DEPTH)
+                ).prefetch_related(
+                    Prefetch(
+                        'children',
+                        queryset=Tag.objects.only('id', 'tag_name', 'parent_id').annotate(
+                            usage_count=Count('script_tag_relations', distinct=True)
+                        ).order_by('-sort_order', 'tag_name'),
+                        to_attr='cached_children'
+                    )
+                )
+            elif self.action == 'list':
+                # TagBriefSerializer 只输出 id、名称和使用次数，游标分页另需 sort_order
+                queryset = queryset.only('id', 'tag_name', 'sort_order')
+            elif self.action == 'destroy':
+                # 删除前的子标签检查与 get_object 合并为同一条查询
+                queryset = queryset.annotate(
+                    has_children=Exists(Tag.objects.filter(parent_id=OuterRef('pk')))
+                )
                 
             return queryset.order_by('sort_order', 'tag_name')
         except Exception as e:
@@ -89,13 +132,13 @@ class TagViewSet(viewsets.ModelViewSet):
         """
         try:
             obj = super().get_object()
-            logger.debug(f"Retrieved tag: {obj.tag_name}")
+            logger.debug("Retrieved tag: %s", obj.tag_name)
             return obj
         except Http404:
             logger.error("Tag not found")
             raise Http404("标签不存在")
         except Exception as e:
-            logger.error(f"Error retrieving tag: {str(e)}\n{traceback.format_exc()}")
+            logger.exception(f"Error retrieving tag: {str(e)}")
             raise
 
     def perform_create(self, serializer):
@@ -111,7 +154,7 @@ class TagViewSet(viewsets.ModelViewSet):
             logger.error(f"Database integrity error while creating tag: {str(e)}")
             raise ValidationError("标签创建失败：数据完整性错误")
         except Exception as e:
-            logger.error(f"Error creating tag: {str(e)}\n{traceback.format_exc()}")
+            logger.exception(f"Error creating tag: {str(e)}")
             raise ValidationError(f"标签创建失败：{str(e)}")
 
     def perform_update(self, serializer):
@@ -128,7 +171,7 @@ class TagViewSet(viewsets.ModelViewSet):
             logger.error(f"Database integrity error while updating tag: {str(e)}")
             raise ValidationError("标签更新失败：数据完整性错误")
         except Exception as e:
-            logger.error(f"Error updating tag: {str(e)}\n{traceback.format_exc()}")
+            logger.exception(f"Error updating tag: {str(e)}")
             raise ValidationError(f"标签更新失败：{str(e)}")
 
     def destroy(self, request, *args, **kwargs):
@@ -138,16 +181,16 @@ class TagViewSet(viewsets.ModelViewSet):
         tag_id = tag.id
         logger.info(f"Attempting to delete tag: {tag_name} (ID: {tag_id})")
         
-        # 检查是否有子标签
-        if tag.children.exists():
+        # 检查是否有子标签（get_queryset 中已注解，无需再次查询）
+        if tag.has_children:
             logger.warning(f"Cannot delete tag {tag_name} (ID: {tag_id}): has child tags")
             return Response(
                 {'error': '无法删除存在子标签的标签'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 检查是否有关联的话术
-        if tag.script_tag_relations.exists():
+        # 检查是否有关联的话术（直接使用聚合注解的使用次数）
+        if tag.usage_count:
             logger.warning(f"Cannot delete tag {tag_name} (ID: {tag_id}): has associated scripts")
             return Response(
                 {'error': '无法删除已被话术使用的标签'},
@@ -171,15 +214,39 @@ class TagViewSet(viewsets.ModelViewSet):
         获取标签树形结构
         """
         try:
-            # 只获取顶级标签
-            root_tags = Tag.objects.filter(parent=None).order_by('sort_order', 'tag_name')
+            include_inactive = self.can_view_inactive
+            
+            # 以标签总数和最近更新时间作为树的版本号：一次索引聚合即可判断缓存是否仍然有效
+            stats = Tag.objects.aggregate(total=Count('id'), last_updated=Max('updated_at'))
+            last_updated = stats['last_updated']
+            version = f"{stats['total']}:{last_updated.timestamp() if last_updated else 0}"
+            cached_tree = TagCacheManager.get_cached_tree(version, include_inactive)
+            if cached_tree is not None:
+                return Response(cached_tree)
+            
+            # 一次查询加载全部标签，在内存中拆分出顶级标签和 parent_id -> 子标签 的映射
+            all_tags = Tag.objects.only(
+                'id', 'tag_name', 'description', 'is_active', 'sort_order', 'parent_id'
+            ).order_by('sort_order', 'tag_name')
+            root_tags = []
+            children_map = defaultdict(list)
+            for tag in all_tags:
+                if tag.parent_id is not None:
+                    children_map[tag.parent_id].append(tag)
+                # 如果用户没有查看未启用标签的权限，则只返回已启用的顶级标签
+                elif include_inactive or tag.is_active:
+                    root_tags.append(tag)
             
-            # 如果用户没有查看未启用标签的权限，则只返回已启用的标签
-            if not request.user.has_perm('tags.can_view_inactive_tags'):
-                root_tags = root_tags.filter(is_active=True)
+            # 子标签按 sort_order 倒序；稳定排序保留数据库返回的名称顺序
+            for children in children_map.values():
+                children.sort(key=lambda child: -child.sort_order)
             
-            serializer = TagTreeSerializer(root_tags, many=True)
-            return Response(serializer.data)
+            serializer = TagTreeSerializer(
+                root_tags, many=True, context={'_children_map': children_map}
+            )
+            data = serializer.data
+            TagCacheManager.cache_tree(version, include_inactive, data)
+            return Response(data)
         except Exception as e:
             logger.error(f"Error retrieving tag tree: {str(e)}")
             return Response(
@@ -193,15 +260,25 @@ class TagViewSet(viewsets.ModelViewSet):
         激活标签
         """
         try:
-            tag = Tag.objects.get(pk=kwargs.get('pk'))
+            # 父标签状态检查和日志中的名称都需要父标签，随标签一次 JOIN 查出
+            tag = Tag.objects.select_related('parent').only(
+                'id', 'tag_name', 'is_active', 'parent', 'parent__tag_name', 'parent__is_active'
+            ).get(pk=kwargs.get('pk'))
             logger.info(f"Attempting to activate tag: {tag} (ID: {tag.id})")
 
             if tag.parent and not tag.parent.is_active:
                 logger.warning(f"Cannot activate tag {tag} (ID: {tag.id}): parent tag is inactive")
                 return Response({"detail": "父标签处于停用状态"}, status=status.HTTP_400_BAD_REQUEST)
 
+            # 只修改状态字段，一条 UPDATE 完成，无需整行保存
             tag.is_active = True
-            tag.save()
+            tag.updated_by = request.user
+            tag.updated_at = timezone.now()
+            Tag.objects.filter(pk=tag.pk).update(
+                is_active=True,
+                updated_by=request.user,
+                updated_at=tag.updated_at
+            )
             logger.info(f"Tag activated successfully: {tag} (ID: {tag.id})")
             return Response({"detail": "标签已激活"}, status=status.HTTP_200_OK)
 
@@ -221,10 +298,8 @@ class TagViewSet(viewsets.ModelViewSet):
             tag = self.get_object()
             logger.info(f"Attempting to deactivate tag: {tag.tag_name} (ID: {tag.id})")
             
-            # 获取受影响的子标签数量
-            affected_children = tag.get_all_children().count()
-            
-            tag.deactivate()
+            # 停用语句返回的行数包含自身，减一即为受影响的子标签数量，无需另行 COUNT
+            affected_children = tag.deactivate(user=request.user) - 1
             
             logger.info(f"Tag deactivated successfully: {tag.tag_name} (ID: {tag.id})")
             return Response({
@@ -251,7 +326,7 @@ class TagViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            logger.error(f"Error deactivating tag: {str(e)}\n{traceback.format_exc()}")
+            logger.exception(f"Error deactivating tag: {str(e)}")
             return Response(
                 {
                     'error': '标签停用失败',
@@ -268,17 +343,12 @@ class TagViewSet(viewsets.ModelViewSet):
         logger.info(f"开始获取标签使用情况: tag_id={tag.id}, tag_name={tag.tag_name}")
         
         try:
-            # 获取使用该标签的话术数量
-            usage_count = tag.script_tag_relations.count()
+            # 直接查询使用该标签的话术，只取简要序列化器需要的字段，不再构造中间关联对象
+            scripts = list(tag.scripts.only(*ScriptBriefSerializer.Meta.fields))
+            # 话术列表已完整取出，使用次数直接取其长度，不再单独 COUNT 或聚合
+            usage_count = len(scripts)
             logger.info(f"标签关联话术数量: {usage_count}")
             
-            # 获取使用该标签的话术列表
-            relations = tag.script_tag_relations.select_related('script').all()
-            logger.info(f"成功获取标签关联关系列表，数量: {len(relations)}")
-            
-            scripts = [relation.script for relation in relations]
-            logger.info(f"提取话术列表完成，数量: {len(scripts)}")
-            
             # 序列化话术数据
             script_data = ScriptBriefSerializer(scripts, many=True).data
             logger.info(f"话术数据序列化完成，序列化后数量: {len(script_data)}")
@@ -309,25 +379,59 @@ class TagViewSet(viewsets.ModelViewSet):
                 'message': '请提供标签名称列表'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        created_tags = []
+        # 先在内存中完成格式校验和批内去重（不区分大小写）
+        max_length = Tag._meta.get_field('tag_name').max_length
+        candidates = {}
+        duplicates = []
         errors = []
+        for tag_name in tag_names:
+            name = tag_name.strip() if isinstance(tag_name, str) else ''
+            if not name:
+                errors.append({'tag_name': tag_name, 'errors': {'tag_name': ['标签名称不能为空']}})
+            elif len(name) > max_length:
+                errors.append({
+                    'tag_name': tag_name,
+                    'errors': {'tag_name': [f'标签名称不能超过{max_length}个字符']}
+                })
+            elif name.upper() in candidates:
+                duplicates.append(name)
+            else:
+                candidates[name.upper()] = name
+        
+        # 一次查询找出已存在的标签名称，与 tag_name_upper_idx 表达式索引一致
+        existing = set(Tag.objects.annotate(tag_name_upper=Upper('tag_name')).filter(
+            tag_name_upper__in=list(candidates)
+        ).values_list('tag_name_upper', flat=True))
+        duplicates.extend(name for key, name in candidates.items() if key in existing)
+        new_names = [name for key, name in candidates.items() if key not in existing]
         
-        with transaction.atomic():
-            for tag_name in tag_names:
-                serializer = self.get_serializer(data={'tag_name': tag_name})
-                if serializer.is_valid():
-                    tag = serializer.save()
-                    created_tags.append(TagBriefSerializer(tag).data)
-                else:
-                    errors.append({
-                        'tag_name': tag_name,
-                        'errors': serializer.errors
-                    })
+        created_count = 0
+        if new_names:
+            user = request.user
+            with transaction.atomic():
+                # 单条多行 INSERT；并发插入的同名标签由唯一约束忽略
+                Tag.objects.bulk_create(
+                    [Tag(tag_name=name, created_by=user, updated_by=user) for name in new_names],
+                    ignore_conflicts=True,
+                    batch_size=500
+                )
+                # 重新查询本次实际插入的标签：批量插入的标签在同一事务内补齐路径后才提交，
+                # 因此事务内可见且路径为空的同名标签只可能是本次插入的
+                created = dict(Tag.objects.filter(
+                    tag_name__in=new_names, created_by=user, path=''
+                ).values_list('id', 'tag_name'))
+                # bulk_create 不调用 save()，统一补齐层级路径
+                Tag.sync_root_paths(Tag.objects.filter(pk__in=list(created)))
+            created_count = len(created)
+            # 被唯一约束忽略的名称（并发请求已创建同名标签）同样计入重复
+            created_keys = {name.upper() for name in created.values()}
+            duplicates.extend(name for name in new_names if name.upper() not in created_keys)
+            logger.info(f"Bulk created {created_count} tags by user: {user.name}")
 
         return Response({
             'status': 'success',
-            'created_count': len(created_tags),
-            'duplicates': [],
+            'created_count': created_count,
+            'duplicates': duplicates,
             'errors': errors
         })
 
@@ -341,24 +445,23 @@ class TagViewSet(viewsets.ModelViewSet):
                 'message': '请提供要删除的标签ID列表'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 检查标签是否在使用中
-        used_tags = Tag.objects.filter(
-            id__in=tag_ids,
-            script_tag_relations__isnull=False
-        ).distinct()
+        # 一次查询取出目标标签并标记是否在使用中，在内存中划分已使用/未使用
+        # 只取 (id, 名称, 是否使用中) 元组，无需构造 Tag 模型实例
+        rows = list(Tag.objects.filter(id__in=tag_ids).annotate(
+            in_use=Exists(ScriptTagRelation.objects.filter(tag_id=OuterRef('pk')))
+        ).values_list('id', 'tag_name', 'in_use'))
+        used_tag_names = [tag_name for _, tag_name, in_use in rows if in_use]
 
-        if used_tags.exists():
-            used_tag_names = [tag.tag_name for tag in used_tags]
+        if used_tag_names:
             return Response({
                 'status': 'error',
                 'message': '以下标签正在使用中，无法删除',
                 'used_tags': used_tag_names
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 删除未使用的标签
+        # 删除未使用的标签（上面已确认全部未使用，按主键删除，无需再次关联查询）
         deleted_count = Tag.objects.filter(
-            id__in=tag_ids,
-            script_tag_relations__isnull=True
+            id__in=[tag_id for tag_id, _, _ in rows]
         ).delete()[0]
 
         return Response({
@@ -369,19 +472,24 @@ class TagViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def usage_statistics(self, request):
         """获取标签使用统计信息"""
-        tags = self.get_queryset().values('id', 'tag_name', 'usage_count')
+        queryset = self.get_queryset()
         
-        # 计算统计信息
-        total_tags = len(tags)
-        total_usage = sum(tag['usage_count'] for tag in tags)
-        unused_tags = sum(1 for tag in tags if tag['usage_count'] == 0)
+        # 统计信息由数据库在聚合注解之上一次计算，无需把全部标签取回 Python 再累加
+        stats = queryset.aggregate(
+            total_tags=Count('id'),
+            total_usage=Coalesce(Sum('usage_count'), 0),
+            unused_tags=Count('id', filter=Q(usage_count=0))
+        )
         
-        return Response({
-            'total_tags': total_tags,
-            'total_usage': total_usage,
-            'unused_tags': unused_tags,
-            'tags': tags
-        })
+        # 游标分页需要 sort_order 计算下一页位置
+        tags = queryset.values('id', 'tag_name', 'sort_order', 'usage_count')
+        page = self.paginate_queryset(tags)
+        if page is not None:
+            response = self.get_paginated_response(page)
+            response.data.update(stats)
+            return response
+        
+        return Response({**stats, 'tags': list(tags)})
 
     @action(detail=False, methods=['get'])
     def search_suggestions(self, request):
@@ -390,8 +498,15 @@ class TagViewSet(viewsets.ModelViewSet):
         if not keyword:
             return Response([])
             
-        tags = Tag.objects.filter(
-            tag_name__icontains=keyword
-        ).values('id', 'tag_name')[:10]  # 限制返回10个建议
+        # 前缀匹配可以使用 tag_name 索引，优先返回；不足时再用包含匹配补齐
+        suggestions = list(Tag.objects.filter(
+            tag_name__istartswith=keyword
+        ).values('id', 'tag_name')[:self.SUGGESTION_LIMIT])
+        if len(suggestions) < self.SUGGESTION_LIMIT:
+            suggestions += Tag.objects.filter(
+                tag_name__icontains=keyword
+            ).exclude(
+                tag_name__istartswith=keyword
+            ).values('id', 'tag_name')[:self.SUGGESTION_LIMIT - len(suggestions)]
         
-        return Response(list(tags))
+        return Response(suggestions)
@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import AdminPasswordChangeForm, AuthenticationForm, PasswordChangeForm
 from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from django.utils.functional import cached_property
 from django.urls import reverse, path
 from django.contrib.auth.models import Group
 from django.http import HttpResponse, JsonResponse
@@ -14,7 +16,9 @@ from django.shortcuts import get_object_or_404, redirect
 from django import forms
 from django.core.exceptions import ValidationError
 from django.contrib.auth import authenticate
+from django.db import transaction
 from .models import User
+from .cache import UserCacheManager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -55,6 +59,32 @@ admin.site.site_header = '用户管理系统'
 admin.site.site_title = '用户管理'
 admin.site.index_title = '管理面板'
 
+# 密码管理按钮模板，地址通过 format_html 转义后填入
+PASSWORD_INFO_HTML = """
+        <div style="margin-top: 10px;">
+            <a href="{change_url}" class="button" style="margin-right: 10px;">修改密码</a>
+            <a href="{reset_url}" class="button" 
+               onclick="return confirm('确定要重置密码吗？重置后密码将为手机号后6位')">
+               重置密码
+            </a>
+        </div>
+        """
+SUPERUSER_PASSWORD_ACTIONS_HTML = """
+            <div>
+                <a href="{change_url}" class="button" style="margin-right: 5px;">修改</a>
+                <a href="{reset_url}" class="button" 
+                   onclick="return confirm('确定要重置密码吗？重置后密码将为手机号后6位')">
+                   重置
+                </a>
+            </div>
+            """
+STAFF_PASSWORD_ACTIONS_HTML = """
+            <div>
+                <a href="{change_url}" class="button" style="margin-right: 5px;">修改</a>
+            </div>
+            """
+NO_PERMISSION_HTML = mark_safe("<span>无权限</span>")
+
 class UserAdminForm(forms.ModelForm):
     """自定义用户管理表单"""
     
@@ -94,7 +124,12 @@ class StaffPasswordChangeForm(PasswordChangeForm):
     def clean_old_password(self):
         """验证旧密码"""
         old_password = self.cleaned_data.get('old_password')
-        if not self.user.check_password(old_password):
+        # 密码哈希计算开销大，表单被重复校验时按输入复用上次的校验结果
+        checked = getattr(self, '_old_password_checked', None)
+        if checked is None or checked[0] != old_password:
+            checked = (old_password, self.user.check_password(old_password))
+            self._old_password_checked = checked
+        if not checked[1]:
             raise forms.ValidationError("旧密码不正确，请重新输入。")
         return old_password
 
@@ -106,6 +141,11 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('is_active', 'is_staff', 'is_superuser', 'start_date', 'end_date')
     search_fields = ('phone_number', 'name')
     ordering = ('-created_at',)
+    # 列表页的“更新者”列随用户一起 JOIN 查出，避免逐行查询
+    list_select_related = ('updated_by',)
+    # 首屏只渲染一页较少的行，并跳过未过滤总数的额外 COUNT(*)
+    list_per_page = 25
+    show_full_result_count = False
     
     fieldsets = (
         (None, {'fields': ('phone_number', 'password', 'get_password_info')}),
@@ -143,70 +183,63 @@ class UserAdmin(BaseUserAdmin):
         ]
         return custom_urls + urls
 
+    @cached_property
+    def password_url_templates(self):
+        """密码修改/重置地址模板：URL 配置运行期不变，只解析一次，逐行渲染时按主键格式化"""
+        change_url = reverse('admin:users_user_password_change', args=[0])
+        reset_url = reverse('admin:users_user_reset_password', args=[0])
+        return (
+            change_url.replace('/0/', '/{pk}/', 1),
+            reset_url.replace('/0/', '/{pk}/', 1),
+        )
+
+    def get_password_urls(self, pk):
+        """获取指定用户的密码修改和重置地址"""
+        change_tpl, reset_tpl = self.password_url_templates
+        return change_tpl.format(pk=pk), reset_tpl.format(pk=pk)
+
     def get_password_info(self, obj):
         """密码管理按钮"""
         if not obj or not obj.pk:
             return ""
         
         # 创建密码管理按钮
-        change_url = reverse('admin:auth_user_password_change', args=[obj.pk])
-        reset_url = reverse('admin:users_user_reset_password', args=[obj.pk])
-        
-        html = f"""
-        <div style="margin-top: 10px;">
-            <a href="{change_url}" class="button" style="margin-right: 10px;">修改密码</a>
-            <a href="{reset_url}" class="button" 
-               onclick="return confirm('确定要重置密码吗？重置后密码将为手机号后6位')">
-               重置密码
-            </a>
-        </div>
-        """
-        return format_html(html)
+        change_url, reset_url = self.get_password_urls(obj.pk)
+        return format_html(PASSWORD_INFO_HTML, change_url=change_url, reset_url=reset_url)
     get_password_info.short_description = '密码操作'
 
-    def password_actions(self, obj):
-        """显示密码管理按钮，根据用户权限显示不同操作"""
-        # 获取当前请求对象
-        request = getattr(self, 'request', None)
-        
-        # 如果没有请求对象，则返回无权限
-        if not request:
-            return "无权限"
-        
-        # 判断当前操作用户的权限级别
+    def get_list_display(self, request):
+        """将“密码操作”列替换为绑定当前请求的渲染函数，请求对象不再保存在共享的 ModelAdmin 实例上"""
+        password_actions = self.build_password_actions(request)
+        return tuple(
+            password_actions if field == 'password_actions' else field
+            for field in super().get_list_display(request)
+        )
+
+    def build_password_actions(self, request):
+        """显示密码管理按钮，根据用户权限显示不同操作；当前用户的角色每个请求只判断一次"""
         current_user = request.user
         is_superuser = current_user.is_superuser
         is_staff = current_user.is_staff and not current_user.is_superuser
-        is_normal_user = not (current_user.is_superuser or current_user.is_staff)
-        
-        # 正确的密码修改URL
-        change_url = reverse('admin:auth_user_password_change', args=[obj.pk])
-        reset_url = reverse('admin:users_user_reset_password', args=[obj.pk])
-        
-        # 根据不同用户角色设置不同操作权限
-        if is_superuser:
-            # 超级用户可以直接修改和重置密码
-            html = f"""
-            <div>
-                <a href="{change_url}" class="button" style="margin-right: 5px;">修改</a>
-                <a href="{reset_url}" class="button" 
-                   onclick="return confirm('确定要重置密码吗？重置后密码将为手机号后6位')">
-                   重置
-                </a>
-            </div>
-            """
-        elif is_staff:
-            # 工作人员需要验证旧密码才能修改，可以看到修改按钮
-            html = f"""
-            <div>
-                <a href="{change_url}" class="button" style="margin-right: 5px;">修改</a>
-            </div>
-            """
-        else:
+
+        def password_actions(obj):
+            # 根据不同用户角色设置不同操作权限
+            if is_superuser:
+                # 超级用户可以直接修改和重置密码
+                change_url, reset_url = self.get_password_urls(obj.pk)
+                return format_html(SUPERUSER_PASSWORD_ACTIONS_HTML, change_url=change_url, reset_url=reset_url)
+            elif is_staff:
+                # 工作人员需要验证旧密码才能修改，可以看到修改按钮
+                change_url, _ = self.get_password_urls(obj.pk)
+                return format_html(STAFF_PASSWORD_ACTIONS_HTML, change_url=change_url)
             # 普通用户没有权限
-            html = "<span>无权限</span>"
-            
-        return format_html(html)
+            return NO_PERMISSION_HTML
+        password_actions.short_description = '密码操作'
+        return password_actions
+
+    def password_actions(self, obj):
+        """未绑定请求时的默认列渲染（列表页由 get_list_display 替换为按请求绑定的版本）"""
+        return NO_PERMISSION_HTML
     password_actions.short_description = '密码操作'
 
     def user_role(self, obj):
@@ -219,27 +252,36 @@ class UserAdmin(BaseUserAdmin):
             return format_html('<span style="color: green;">普通用户</span>')
     user_role.short_description = '用户身份'
 
+    def get_password_reset_target(self, request, object_id):
+        """获取待重置密码的用户：沿用列表的权限过滤，只取权限判断和重置所需字段，并加行锁"""
+        return self.get_queryset(request).select_for_update().only(
+            'pk', 'name', 'phone_number', 'is_superuser', 'is_staff'
+        ).get(pk=object_id)
+
     @method_decorator(csrf_protect)
     def reset_password(self, request, object_id):
         """重置用户密码"""
         try:
-            user = self.get_object(request, object_id)
-            
-            # 检查权限
-            if not self.has_change_permission(request, user):
-                messages.error(request, '您没有权限重置此用户的密码')
-                return redirect('admin:users_user_changelist')
+            # 权限检查和密码写入在同一事务内完成，期间锁定该用户行
+            with transaction.atomic():
+                user = self.get_password_reset_target(request, object_id)
                 
-            # 超级用户可以重置所有用户的密码
-            # 工作人员只能重置普通用户的密码
-            if not request.user.is_superuser and (user.is_superuser or user.is_staff):
-                messages.error(request, '您没有权限重置管理员或工作人员的密码')
-                return redirect('admin:users_user_changelist')
-                
-            # 生成默认密码（手机号后6位）
-            default_password = user.phone_number[-6:]
-            user.set_password(default_password)
-            user.save()
+                # 检查权限
+                if not self.has_change_permission(request, user):
+                    messages.error(request, '您没有权限重置此用户的密码')
+                    return redirect('admin:users_user_changelist')
+                    
+                # 超级用户可以重置所有用户的密码
+                # 工作人员只能重置普通用户的密码
+                if not request.user.is_superuser and (user.is_superuser or user.is_staff):
+                    messages.error(request, '您没有权限重置管理员或工作人员的密码')
+                    return redirect('admin:users_user_changelist')
+                    
+                # 生成默认密码（手机号后6位），只更新密码字段
+                default_password = user.phone_number[-6:]
+                user.set_password(default_password)
+                user.save(update_fields=['password'])
+            UserCacheManager.bump_version()
             
             messages.success(request, f'已成功重置用户 {user.name} 的密码为手机号后6位')
             return redirect('admin:users_user_changelist')
@@ -251,23 +293,26 @@ class UserAdmin(BaseUserAdmin):
     def reset_user_password(self, request, object_id):
         """从用户详情页重置密码"""
         try:
-            user = self.get_object(request, object_id)
-            
-            # 检查权限
-            if not self.has_change_permission(request, user):
-                messages.error(request, '您没有权限重置此用户的密码')
-                return redirect(request.path.replace('/reset-password/', ''))
+            # 权限检查和密码写入在同一事务内完成，期间锁定该用户行
+            with transaction.atomic():
+                user = self.get_password_reset_target(request, object_id)
                 
-            # 超级用户可以重置所有用户的密码
-            # 工作人员只能重置普通用户的密码
-            if not request.user.is_superuser and (user.is_superuser or user.is_staff):
-                messages.error(request, '您没有权限重置管理员或工作人员的密码')
-                return redirect(request.path.replace('/reset-password/', ''))
-                
-            # 生成默认密码（手机号后6位）
-            default_password = user.phone_number[-6:]
-            user.set_password(default_password)
-            user.save()
+                # 检查权限
+                if not self.has_change_permission(request, user):
+                    messages.error(request, '您没有权限重置此用户的密码')
+                    return redirect(request.path.replace('/reset-password/', ''))
+                    
+                # 超级用户可以重置所有用户的密码
+                # 工作人员只能重置普通用户的密码
+                if not request.user.is_superuser and (user.is_superuser or user.is_staff):
+                    messages.error(request, '您没有权限重置管理员或工作人员的密码')
+                    return redirect(request.path.replace('/reset-password/', ''))
+                    
+                # 生成默认密码（手机号后6位），只更新密码字段
+                default_password = user.phone_number[-6:]
+                user.set_password(default_password)
+                user.save(update_fields=['password'])
+            UserCacheManager.bump_version()
             
             messages.success(request, f'已成功重置用户 {user.name} 的密码为手机号后6位')
             return redirect(request.path.replace('/reset-password/', ''))
@@ -360,12 +405,27 @@ class UserAdmin(BaseUserAdmin):
             obj.is_staff = False
             
         super().save_model(request, obj, form, change)
+        UserCacheManager.bump_version()
+
+    def delete_model(self, request, obj):
+        """删除用户后使用户缓存失效"""
+        super().delete_model(request, obj)
+        UserCacheManager.bump_version()
+
+    def delete_queryset(self, request, queryset):
+        """批量删除用户后使用户缓存失效"""
+        super().delete_queryset(request, queryset)
+        UserCacheManager.bump_version()
+
+    def user_change_password(self, request, id, form_url=''):
+        """后台修改密码成功（重定向）后使用户缓存失效"""
+        response = super().user_change_password(request, id, form_url)
+        if request.method == 'POST' and response.status_code == 302:
+            UserCacheManager.bump_version()
+        return response
 
     def get_form(self, request, obj=None, **kwargs):
         """重写get_form方法，根据用户角色返回不同的密码修改表单"""
-        # 保存请求对象，以便在其他方法中使用
-        self.request = request
-        
         # 处理密码修改表单
         if request.path.endswith('password/'):
             if request.user.is_superuser:
@@ -375,8 +435,3 @@ class UserAdmin(BaseUserAdmin):
                 # 普通用户和工作人员使用需要验证旧密码的表单
                 kwargs['form'] = StaffPasswordChangeForm
         return super().get_form(request, obj, **kwargs)
-        
-    def changelist_view(self, request, extra_context=None):
-        """保存请求对象，以便在列表视图中使用"""
-        self.request = request
-        return super().changelist_view(request, extra_context)
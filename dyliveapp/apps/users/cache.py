@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from urllib.parse import urlencode
+import hashlib
+import logging
+from typing import Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class UserCacheManager:
+    """
+    用户缓存管理器
+
+    写操作通过递增版本号使旧缓存失效。版本号存放在默认缓存中，当前为进程内的
+    LocMemCache：多进程部署时其他进程的版本号不会同步递增，仍可能返回最多
+    LIST_TIMEOUT / PROFILE_TIMEOUT 秒前的旧数据；需要跨进程即时失效时应改用共享缓存（如 Redis）。
+    """
+
+    # 缓存键前缀
+    LIST_PREFIX = "users:list:"
+    PROFILE_PREFIX = "users:profile:"
+    VERSION_KEY = "users:version"
+
+    # 缓存过期时间（秒）
+    LIST_TIMEOUT = 60  # 1分钟
+    PROFILE_TIMEOUT = 60  # 1分钟
+
+    @classmethod
+    def get_version(cls) -> int:
+        """获取用户数据版本号，用户新增、修改、删除后递增，旧缓存自然失效"""
+        try:
+            return cache.get_or_set(cls.VERSION_KEY, 1, None)
+        except Exception as e:
+            logger.error("Error getting user cache version: %s", e)
+            return 0
+
+    @classmethod
+    def bump_version(cls) -> None:
+        """递增用户数据版本号"""
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_KEY, 2, None)
+        except Exception as e:
+            logger.error("Error bumping user cache version: %s", e)
+
+    @classmethod
+    def get_list_cache_key(cls, user_id: int, params: Iterable[Tuple[str, Any]]) -> str:
+        """获取用户列表缓存键：按请求用户和排序后的查询参数区分"""
+        digest = hashlib.blake2b(urlencode(sorted(params), doseq=True).encode(), digest_size=8).hexdigest()
+        return f"{cls.LIST_PREFIX}{cls.get_version()}:{user_id}:{digest}"
+
+    @classmethod
+    def get_profile_cache_key(cls, user_id: int) -> str:
+        """获取用户资料缓存键"""
+        return f"{cls.PROFILE_PREFIX}{cls.get_version()}:{user_id}"
+
+    @classmethod
+    def get(cls, cache_key: str) -> Optional[Any]:
+        """读取缓存"""
+        try:
+            data = cache.get(cache_key)
+            if data is not None:
+                logger.debug("Cache hit for users: %s", cache_key)
+            return data
+        except Exception as e:
+            logger.error("Error getting cached users data: %s", e)
+            return None
+
+    @classmethod
+    def set(cls, cache_key: str, data: Any, timeout: int) -> None:
+        """写入缓存"""
+        try:
+            cache.set(cache_key, data, timeout)
+            logger.debug("Cached users data: %s", cache_key)
+        except Exception as e:
+            logger.error("Error caching users data: %s", e)
@@ -1,11 +1,16 @@
 from django.shortcuts import redirect
 from django.urls import resolve, reverse
 from django.contrib import messages
-import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 管理后台中无需权限检查的登录/登出路径
+ADMIN_AUTH_PATHS = frozenset((
+    '/admin/login', '/admin/login/',
+    '/admin/logout', '/admin/logout/',
+))
+
 class AdminLoginRestrictionMiddleware:
     """
     限制普通用户登录管理系统的中间件
@@ -14,15 +19,15 @@ class AdminLoginRestrictionMiddleware:
         self.get_response = get_response
         
     def __call__(self, request):
-        # 检查是否是管理员页面的请求
-        path = request.path_info.lstrip('/')
+        # 检查是否是管理员页面的请求（直接比较原路径，不再为去除前导斜杠生成新字符串）
+        path = request.path_info
         
         # 记录请求路径，便于调试
-        logger.debug(f"AdminLoginRestrictionMiddleware: 处理路径 {path}")
+        logger.debug("AdminLoginRestrictionMiddleware: 处理路径 %s", path)
         
-        if path.startswith('admin/'):
+        if path.startswith('/admin/'):
             # 如果是登录页面或登出页面，直接放行
-            if re.match(r'^admin/login/?$', path) or re.match(r'^admin/logout/?$', path):
+            if path in ADMIN_AUTH_PATHS:
                 logger.debug("AdminLoginRestrictionMiddleware: 允许访问登录/登出页面")
                 return self.get_response(request)
                 
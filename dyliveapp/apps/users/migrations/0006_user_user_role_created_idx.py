@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-16 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_alter_user_options_remove_user_phone_number_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_staff', 'is_superuser', '-created_at'], name='user_role_created_idx'),
+        ),
+    ]
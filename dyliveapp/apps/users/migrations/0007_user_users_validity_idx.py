@@ -0,0 +1,17 @@
+# Generated by Django 4.2.19 on 2026-10-16 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_user_role_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['start_date', 'end_date'], name='users_validity_idx'),
+        ),
+    ]
@@ -1,15 +1,27 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models import Case, Value, When
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 import logging
+import re
 from typing import Optional, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# 手机号格式，模块加载时编译一次，模型字段、序列化器和校验函数共用
+PHONE_NUMBER_RE = re.compile(r'^1[3-9]\d{9}$')
+phone_number_validator = RegexValidator(
+    regex=PHONE_NUMBER_RE,
+    message='请输入有效的11位手机号'
+)
+
+# bytes.translate 的删除表：除 ASCII 数字 0-9 外的全部字节
+_NON_DIGIT_BYTES = bytes(i for i in range(256) if not 0x30 <= i <= 0x39)
+
 def validate_phone_number(phone_number: str) -> None:
     """
     验证手机号格式
@@ -20,12 +32,8 @@ def validate_phone_number(phone_number: str) -> None:
     Raises:
         ValidationError: 当手机号格式不正确时抛出
     """
-    phone_validator = RegexValidator(
-        regex=r'^1[3-9]\d{9}$',
-        message='请输入有效的11位手机号'
-    )
     try:
-        phone_validator(phone_number)
+        phone_number_validator(phone_number)
     except ValidationError as e:
         logger.error(f"Invalid phone number format: {phone_number}")
         raise ValidationError({'phone_number': str(e)})
@@ -40,7 +48,8 @@ def normalize_phone_number(phone_number: str) -> str:
     Returns:
         str: 规范化后的手机号
     """
-    return ''.join(filter(str.isdigit, str(phone_number)))
+    # 在 C 层一次性删除非数字字节，避免逐字符调用 Python 函数；非 ASCII 字符直接丢弃
+    return str(phone_number).encode('ascii', 'ignore').translate(None, _NON_DIGIT_BYTES).decode('ascii')
 
 class UserManager(BaseUserManager):
     """自定义用户管理器"""
@@ -75,12 +84,7 @@ class User(AbstractUser):
         '手机号',
         max_length=11,
         unique=True,
-        validators=[
-            RegexValidator(
-                regex=r'^1[3-9]\d{9}$',
-                message='请输入有效的11位手机号'
-            )
-        ],
+        validators=[phone_number_validator],
         help_text='用户手机号，用于登录'
     )
     name = models.CharField('姓名', max_length=50, help_text='用户姓名')
@@ -114,13 +118,29 @@ class User(AbstractUser):
         verbose_name = '前端用户'
         verbose_name_plural = '前端用户'
         ordering = ['-created_at']
+        indexes = [
+            # 工作人员的用户管理列表按角色过滤并按创建时间倒序分页
+            models.Index(fields=['is_staff', 'is_superuser', '-created_at'], name='user_role_created_idx'),
+            # 按有效期过滤用户（UserFilter.filter_is_active）
+            models.Index(fields=['start_date', 'end_date'], name='users_validity_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name}({self.phone_number})"
 
-    def is_valid(self):
-        """检查用户是否在有效期内"""
-        today = timezone.now().date()
+    @staticmethod
+    def validity_expression(today):
+        """is_valid() 的数据库表达式版本，用于在查询集中注解有效状态"""
+        return Case(
+            When(is_active=True, start_date__lte=today, end_date__gte=today, then=Value(True)),
+            default=Value(False),
+            output_field=models.BooleanField(),
+        )
+
+    def is_valid(self, today=None):
+        """检查用户是否在有效期内，批量判断时可传入预先计算的当天日期"""
+        if today is None:
+            today = timezone.now().date()
         return (
             self.is_active and 
             self.start_date <= today <= self.end_date
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
-from django.core.validators import RegexValidator
+from django.db import DatabaseError, IntegrityError
 import logging
-from .models import User
-import re
+from .models import User, PHONE_NUMBER_RE, phone_number_validator
 from django.contrib.auth import authenticate
 
 logger = logging.getLogger(__name__)
@@ -35,12 +36,7 @@ class UserSerializer(serializers.ModelSerializer):
     )
     is_active = serializers.SerializerMethodField()
     phone_number = serializers.CharField(
-        validators=[
-            RegexValidator(
-                regex=r'^1[3-9]\d{9}$',
-                message='请输入有效的11位手机号'
-            )
-        ],
+        validators=[phone_number_validator],
         error_messages={
             'required': '请输入手机号',
             'blank': '手机号不能为空'
@@ -56,50 +52,61 @@ class UserSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 当天日期每个序列化器实例只计算一次，列表序列化时所有行共用
+        self._today = timezone.now().date()
+
     def get_is_active(self, obj):
-        """获取用户是否在有效期内"""
-        return obj.is_valid()
+        """获取用户是否在有效期内：优先读取查询集注解，新建用户、个人资料等未注解的实例按字段计算"""
+        is_valid = getattr(obj, '_is_valid', None)
+        if is_valid is None:
+            return obj.is_valid(self._today)
+        return bool(is_valid)
 
     def validate_phone_number(self, value):
         """验证手机号"""
         try:
-            # 检查手机号是否已存在
-            if self.instance is None:  # 创建新用户时
-                if User.objects.filter(phone_number=value).exists():
-                    raise serializers.ValidationError("该手机号已被注册")
-            else:  # 更新用户时
-                if User.objects.filter(phone_number=value).exclude(id=self.instance.id).exists():
-                    raise serializers.ValidationError("该手机号已被注册")
+            # 检查手机号是否已存在（更新用户时排除自身），只走一次唯一索引查询
+            queryset = User.objects.filter(phone_number=value)
+            if self.instance is not None:
+                queryset = queryset.exclude(pk=self.instance.pk)
+            if queryset.exists():
+                raise serializers.ValidationError("该手机号已被注册")
             return value
-        except Exception as e:
+        except DatabaseError as e:
             logger.error(f"Phone number validation error: {str(e)}")
             raise
 
     def validate(self, data):
         """验证数据"""
-        try:
-            # 验证密码
-            if 'password' in data and 'confirm_password' in data:
-                if data['password'] != data['confirm_password']:
-                    raise serializers.ValidationError({"confirm_password": "两次输入的密码不一致"})
-            
-            # 验证日期
-            if 'start_date' in data and 'end_date' in data:
-                if data['start_date'] > data['end_date']:
-                    raise serializers.ValidationError({"end_date": "结束日期不能早于开始日期"})
-                
-                # 如果是更新操作，且更新了日期，检查是否会影响现有用户
-                if self.instance and self.instance.is_valid():
-                    today = timezone.now().date()
-                    if data['end_date'] < today:
-                        raise serializers.ValidationError({"end_date": "不能将有效期结束日期设置为过去的日期"})
+        # 验证密码
+        if 'password' in data and 'confirm_password' in data:
+            if data['password'] != data['confirm_password']:
+                raise serializers.ValidationError({"confirm_password": "两次输入的密码不一致"})
+        
+        # 按 AUTH_PASSWORD_VALIDATORS 校验密码强度，相似度检查需要用户属性
+        if 'password' in data:
+            user = self.instance or User(
+                phone_number=data.get('phone_number', ''),
+                name=data.get('name', '')
+            )
+            try:
+                validate_password(data['password'], user)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError({"password": list(e.messages)})
+        
+        # 验证日期
+        if 'start_date' in data and 'end_date' in data:
+            if data['start_date'] > data['end_date']:
+                raise serializers.ValidationError({"end_date": "结束日期不能早于开始日期"})
             
-            return data
-        except serializers.ValidationError:
-            raise
-        except Exception as e:
-            logger.error(f"Data validation error: {str(e)}")
-            raise serializers.ValidationError("数据验证失败")
+            # 如果是更新操作，且更新了日期，检查是否会影响现有用户
+            if self.instance and self.instance.is_valid(self._today):
+                if data['end_date'] < self._today:
+                    raise serializers.ValidationError({"end_date": "不能将有效期结束日期设置为过去的日期"})
+        
+        return data
 
     def create(self, validated_data):
         """创建用户"""
@@ -116,9 +123,9 @@ class UserSerializer(serializers.ModelSerializer):
                 **validated_data
             )
             
-            logger.info(f"User created successfully: {user.name}")
+            logger.info("User created successfully: %s", user.name)
             return user
-        except Exception as e:
+        except IntegrityError as e:
             logger.error(f"User creation error: {str(e)}")
             raise serializers.ValidationError("用户创建失败")
 
@@ -126,20 +133,24 @@ class UserSerializer(serializers.ModelSerializer):
         """更新用户"""
         try:
             validated_data.pop('confirm_password', None)
+            # 只更新本次提交的字段；updated_at 为 auto_now，需显式列出才会写入
+            update_fields = ['updated_at']
             
             # 如果提供了新密码，则更新密码
             if 'password' in validated_data:
                 password = validated_data.pop('password')
                 instance.set_password(password)
+                update_fields.append('password')
             
             # 更新其他字段
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
+            update_fields.extend(validated_data)
             
-            instance.save()
-            logger.info(f"User updated successfully: {instance.name}")
+            instance.save(update_fields=update_fields)
+            logger.info("User updated successfully: %s", instance.name)
             return instance
-        except Exception as e:
+        except IntegrityError as e:
             logger.error(f"User update error: {str(e)}")
             raise serializers.ValidationError("用户更新失败")
 
@@ -163,24 +174,18 @@ class UserLoginSerializer(serializers.Serializer):
 
     def validate_phone_number(self, value):
         """验证手机号格式"""
-        logger.debug(f"验证手机号: {value}")
+        logger.debug("验证手机号: %s", value)
         
         if not value:
             logger.warning("手机号为空")
             raise serializers.ValidationError('手机号不能为空')
             
-        if not re.match(r'^1[3-9]\d{9}$', value):
-            logger.warning(f"手机号格式无效: {value}")
+        if not PHONE_NUMBER_RE.match(value):
+            logger.warning("手机号格式无效: %s", value)
             raise serializers.ValidationError('请输入有效的11位手机号')
-            
-        # 检查用户是否存在
-        try:
-            user = User.objects.get(phone_number=value)
-            logger.debug(f"找到用户: {user.phone_number}")
-        except User.DoesNotExist:
-            logger.warning(f"用户不存在: {value}")
-            raise serializers.ValidationError('用户不存在')
-            
+
+        # 不单独查询用户是否存在：由 validate() 中的认证统一查询，
+        # 用户不存在与密码错误返回相同提示，避免暴露手机号是否已注册
         return value
 
     def validate(self, attrs):
@@ -191,7 +196,7 @@ class UserLoginSerializer(serializers.Serializer):
             phone_number = attrs.get('phone_number')
             password = attrs.get('password')
             
-            logger.debug(f"尝试认证用户: {phone_number}")
+            logger.debug("尝试认证用户: %s", phone_number)
             
             # 使用 authenticate 进行认证
             user = authenticate(
@@ -200,30 +205,28 @@ class UserLoginSerializer(serializers.Serializer):
             )
             
             if not user:
-                logger.warning(f"认证失败: {phone_number}")
+                logger.warning("认证失败: %s", phone_number)
                 raise serializers.ValidationError({
                     'non_field_errors': ['手机号或密码错误']
                 })
 
             if not user.is_active:
-                logger.warning(f"用户已禁用: {phone_number}")
+                logger.warning("用户已禁用: %s", phone_number)
                 raise serializers.ValidationError({
                     'non_field_errors': ['该账号已被禁用']
                 })
 
             if not user.is_valid():
-                logger.warning(f"账号已过期: {phone_number}")
+                logger.warning("账号已过期: %s", phone_number)
                 raise serializers.ValidationError({
                     'non_field_errors': ['账号已过期']
                 })
 
-            logger.info(f"用户认证成功: {phone_number}")
+            logger.info("用户认证成功: %s", phone_number)
             attrs['user'] = user
             return attrs
 
-        except serializers.ValidationError:
-            raise
-        except Exception as e:
+        except DatabaseError as e:
             logger.error(f"验证过程发生错误: {str(e)}")
             raise serializers.ValidationError({
                 'non_field_errors': ['登录验证失败']
@@ -233,12 +236,9 @@ class UserLoginSerializer(serializers.Serializer):
         ref_name = 'UserLogin'  # 为 API 文档提供引用名称
 
 class UserBriefSerializer(serializers.ModelSerializer):
-    """用户简要信息序列化器（用于列表展示）"""
-    is_active = serializers.SerializerMethodField()
+    """用户简要信息序列化器（用于列表展示，实例需带有 _is_valid 注解）"""
+    is_active = serializers.BooleanField(source='_is_valid', read_only=True)
 
     class Meta:
         model = User
         fields = ['id', 'name', 'phone_number', 'is_active']
-
-    def get_is_active(self, obj):
-        return obj.is_valid()
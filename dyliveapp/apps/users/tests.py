@@ -8,6 +8,8 @@ from .models import User
 import logging
 import uuid
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 import json
 
 logger = logging.getLogger(__name__)
@@ -23,10 +25,8 @@ class UserModelTests(TestCase):
             'end_date': (timezone.now() + timedelta(days=365)).date(),
             'is_active': True
         }
-        # 创建用户并设置密码
+        # create_user 已对密码做哈希，无需再次 set_password + save
         self.user = User.objects.create_user(**self.user_data)
-        self.user.set_password(self.user_data['password'])
-        self.user.save()
 
     def test_user_creation(self):
         """测试用户创建"""
@@ -52,19 +52,24 @@ class UserModelTests(TestCase):
 class UserAPITests(TestCase):
     """用户API测试类"""
     
-    def setUp(self):
-        """测试前准备工作"""
-        self.client = APIClient()
-        self.user = User.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        """类级别测试数据：只创建一次，各测试方法之间由事务回滚隔离"""
+        # 密码哈希只计算一次，建用户时直接写入，避免 create + set_password + save 两次写库
+        cls.user = User.objects.create(
             username='testuser',
             phone_number='13800138000',
             name='测试用户',
+            password=make_password('testpass123'),
             start_date=timezone.now().date(),
             end_date=timezone.now().date() + timezone.timedelta(days=365),
             is_active=True
         )
-        self.user.set_password('testpass123')
-        self.user.save()
+        logger.info(f"测试用户创建成功: {cls.user.phone_number}")
+
+    def setUp(self):
+        """测试前准备工作"""
+        self.client = APIClient()
         
         # 测试用户数据
         self.user_data = {
@@ -77,8 +82,6 @@ class UserAPITests(TestCase):
             'end_date': '2026-03-05',
             'is_active': True
         }
-        
-        logger.info(f"测试用户创建成功: {self.user.phone_number}")
 
     def test_user_registration(self):
         """测试用户注册"""
@@ -118,6 +121,10 @@ class UserAPITests(TestCase):
         logger.debug(f"无效登录响应内容: {response.content.decode('utf-8')}")
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+        # 请求体不是 JSON 对象时返回验证错误而不是服务器错误
+        response = self.client.post(url, [data], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_change_password(self):
         """测试修改密码"""
         # 先登录
@@ -160,4 +167,22 @@ class UserAPITests(TestCase):
         data = {'phone_number': '13700000000'}
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.json()['exists'], False) 
\ No newline at end of file
+        self.assertEqual(response.json()['exists'], False)
+
+    def test_user_list_cache(self):
+        """测试用户列表缓存在新增用户后失效"""
+        cache.clear()
+        self.client.force_authenticate(user=self.user)
+        url = reverse('users-list')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 1)
+        self.assertTrue(response.json()[0]['is_active'])
+
+        response = self.client.post(url, self.user_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
@@ -11,8 +11,3 @@ urlpatterns = [
     # 包含路由器生成的URL
     path('', include(router.urls)),
 ]
-
-# 打印URL模式以进行调试
-print("Available patterns:")
-for pattern in router.urls:
-    print(f"  {pattern.pattern}")
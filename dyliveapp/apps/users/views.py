@@ -10,15 +10,12 @@ import logging
 from django.core.cache import cache
 from django.conf import settings
 from django.db.models import Q
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 import re
-from django.contrib.auth import authenticate
 import traceback
 
-from .models import User
+from .cache import UserCacheManager
+from .models import User, PHONE_NUMBER_RE
 from .serializers import UserSerializer, UserLoginSerializer, UserBriefSerializer
 
 # 配置日志
@@ -63,21 +60,55 @@ class UserViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         
         if self.action == 'list':
-            # 列表查询时只返回必要字段，不使用 select_related
+            # 列表查询时只返回必要字段，不使用 select_related；有效状态由数据库直接计算
+            return queryset.only('id', 'name', 'phone_number').annotate(
+                _is_valid=User.validity_expression(timezone.now().date())
+            )
+        elif self.action == 'retrieve':
+            # 详情序列化器不输出创建者/更新者，无需关联查询，只加载序列化用到的字段
+            return queryset.only(
+                'id', 'username', 'name', 'phone_number', 'is_active',
+                'start_date', 'end_date', 'created_at', 'updated_at'
+            ).annotate(_is_valid=User.validity_expression(timezone.now().date()))
+        elif self.action in ['update', 'partial_update']:
+            # 更新会修改有效期字段，注解值会过期，因此不注解，由序列化器按字段重新计算
             return queryset.only(
-                'id', 'name', 'phone_number', 'start_date', 'end_date'
+                'id', 'username', 'name', 'phone_number', 'is_active',
+                'start_date', 'end_date', 'created_at', 'updated_at'
             )
-        elif self.action in ['retrieve', 'update', 'partial_update']:
-            # 详情查询时，仅预加载更新用户关系
-            return queryset.prefetch_related('updated_by')
         
         return queryset
 
-    @method_decorator(cache_page(60))  # 缓存1分钟
-    @method_decorator(vary_on_cookie)
     def list(self, request, *args, **kwargs):
-        """列表查询添加缓存"""
-        return super().list(request, *args, **kwargs)
+        """列表查询添加缓存（按请求用户和查询参数缓存序列化结果）"""
+        cache_key = UserCacheManager.get_list_cache_key(request.user.id, request.query_params.lists())
+        data = UserCacheManager.get(cache_key)
+        if data is None:
+            data = self.build_list_data()
+            UserCacheManager.set(cache_key, data, UserCacheManager.LIST_TIMEOUT)
+        return Response(data)
+
+    def build_list_data(self):
+        """
+        构建列表数据：直接读取字段值字典，不实例化模型也不逐行走序列化器，
+        输出字段与 UserBriefSerializer 保持一致
+        """
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            'id', 'name', 'phone_number', '_is_valid'
+        )
+        page = self.paginate_queryset(queryset)
+        data = [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'phone_number': row['phone_number'],
+                'is_active': bool(row['_is_valid']),
+            }
+            for row in (page if page is not None else queryset)
+        ]
+        if page is not None:
+            return self.get_paginated_response(data).data
+        return data
 
     def get_permissions(self):
         """根据不同的操作设置不同的权限"""
@@ -99,61 +130,61 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer.save(created_by=self.request.user)
         else:
             serializer.save()
+        UserCacheManager.bump_version()
 
     def perform_update(self, serializer):
         """更新用户时设置更新者"""
         serializer.save(updated_by=self.request.user)
+        UserCacheManager.bump_version()
+
+    def perform_destroy(self, instance):
+        """删除用户后使用户缓存失效"""
+        instance.delete()
+        UserCacheManager.bump_version()
 
     @action(detail=False, methods=['post'], url_path='login')
     def login(self, request):
         """用户登录"""
-        logger.info(f"开始处理登录请求: {request.data}")
+        logger.info("开始处理登录请求")
         
-        try:
-            serializer = UserLoginSerializer(data=request.data)
-            if not serializer.is_valid():
-                logger.warning(f"数据验证失败: {serializer.errors}")
-                return Response({
-                    'status': 'error',
-                    'message': serializer.errors
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # 获取验证后的用户
-            user = serializer.validated_data['user']
-            logger.info(f"用户验证成功: {user.phone_number}")
-
-            # 生成令牌
-            refresh = RefreshToken.for_user(user)
-            
-            return Response({
-                'status': 'success',
-                'data': {
-                    'token': {
-                        'refresh': str(refresh),
-                        'access': str(refresh.access_token),
-                    },
-                    'user': {
-                        'id': user.id,
-                        'name': user.name,
-                        'phone_number': user.phone_number,
-                    }
-                }
-            })
-
-        except Exception as e:
-            logger.error(f"登录过程发生错误: {str(e)}")
+        serializer = UserLoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.warning("数据验证失败: %s", serializer.errors)
             return Response({
                 'status': 'error',
-                'message': {
-                    'non_field_errors': ['登录失败，请稍后重试']
+                'message': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # 获取验证后的用户
+        user = serializer.validated_data['user']
+        logger.info("用户验证成功: %s", user.phone_number)
+
+        # 生成令牌
+        refresh = RefreshToken.for_user(user)
+        
+        return Response({
+            'status': 'success',
+            'data': {
+                'token': {
+                    'refresh': str(refresh),
+                    'access': str(refresh.access_token),
+                },
+                'user': {
+                    'id': user.id,
+                    'name': user.name,
+                    'phone_number': user.phone_number,
                 }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            }
+        })
 
     @action(detail=False, methods=['post'], url_path='check-phone')
     def check_phone(self, request):
         """检查手机号是否已注册"""
-        phone_number = request.data.get('phone_number', '')
-        exists = User.objects.filter(phone_number=phone_number).exists()
+        phone_number = str(request.data.get('phone_number', ''))
+        # 格式不合法的手机号不可能已注册，无需查询数据库；exists() 只走唯一索引取 1 行
+        exists = bool(PHONE_NUMBER_RE.match(phone_number)) and User.objects.filter(
+            phone_number=phone_number
+        ).exists()
         return Response({'exists': exists})
 
     @action(detail=True, methods=['post'], url_path='change-password')
@@ -164,30 +195,37 @@ class UserViewSet(viewsets.ModelViewSet):
         new_password = request.data.get('new_password')
         confirm_password = request.data.get('confirm_password')
         
-        logger.info(f"测试修改密码请求数据: {request.data}")
+        logger.info("修改密码请求: user_id=%s", user.pk)
         
-        # 验证旧密码
-        if not authenticate(username=user.phone_number, password=old_password):
+        # 先做不涉及哈希计算的校验
+        if new_password != confirm_password:
             return Response({
                 'status': 'error',
-                'message': {'old_password': ['旧密码不正确']}
+                'message': {'confirm_password': ['两次输入的密码不一致']}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if new_password == old_password:
+            return Response({
+                'status': 'error',
+                'message': {'new_password': ['新密码不能与旧密码相同']}
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 验证新密码
-        if new_password != confirm_password:
+        # 验证旧密码：get_object() 已加载用户，直接校验，无需再经认证后端查询一次
+        if not user.check_password(old_password):
             return Response({
                 'status': 'error',
-                'message': {'confirm_password': ['两次输入的密码不一致']}
+                'message': {'old_password': ['旧密码不正确']}
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # 设置新密码
         user.set_password(new_password)
-        user.save()
+        user.save(update_fields=['password'])
+        UserCacheManager.bump_version()
         
         # 生成新令牌
         refresh = RefreshToken.for_user(user)
         
-        logger.info(f"Password changed successfully for user: {user.name}")
+        logger.info("Password changed successfully for user: %s", user.name)
         
         response_data = {
             'status': 'success',
@@ -198,14 +236,14 @@ class UserViewSet(viewsets.ModelViewSet):
             }
         }
         
-        logger.debug(f"修改密码响应内容: {response_data}")
-        
         return Response(response_data)
 
     @action(detail=False)
-    @method_decorator(cache_page(60))
-    @method_decorator(vary_on_cookie)
     def profile(self, request):
         """获取用户资料（添加缓存）"""
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        cache_key = UserCacheManager.get_profile_cache_key(request.user.id)
+        data = UserCacheManager.get(cache_key)
+        if data is None:
+            data = UserSerializer(request.user).data
+            UserCacheManager.set(cache_key, data, UserCacheManager.PROFILE_TIMEOUT)
+        return Response(data)
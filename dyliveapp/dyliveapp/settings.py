@@ -116,6 +116,9 @@ DATABASES = {
                 SET innodb_flush_log_at_trx_commit = 2;
             """,
             'autocommit': True,
+            # InnoDB 默认 REPEATABLE READ 会在唯一性探测和插入时加间隙锁，
+            # 并发创建标签/话术时互相阻塞；READ COMMITTED 只锁实际命中的行
+            'isolation_level': 'read committed',
         }
     }
 }
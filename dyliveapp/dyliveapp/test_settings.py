@@ -0,0 +1,19 @@
+"""
+测试环境配置
+
+在默认配置基础上将数据库替换为内存 SQLite，免去 MySQL 的网络往返和磁盘写入，
+适合本地快速迭代运行单元测试：
+
+    pytest --ds=dyliveapp.test_settings apps/tags/tests.py
+
+依赖 MySQL 行锁语义的并发集成测试仍应使用默认配置运行。
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
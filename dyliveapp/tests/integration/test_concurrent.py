@@ -1,82 +1,113 @@
-import pytest
 import threading
-import random
-import string
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+import secrets
+from django.test import TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from apps.tags.models import Tag
 from apps.scripts.models import Script
 from rest_framework.test import APIClient
-from django.db import transaction
+from rest_framework_simplejwt.tokens import AccessToken
+from django.db import connection
 
 User = get_user_model()
 
+# 每个并发测试同时发起的请求数
+WORKER_COUNT = 10
+
+# 并发请求允许的响应状态码：创建成功，或因重复等原因被校验拒绝
+ACCEPTED_STATUS_CODES = frozenset({201, 400})
+
+# 测试用户密码只用于认证，使用快速哈希算法避免高成本的密码计算
+FAST_PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 def random_string(length=10):
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
+    # 一次系统随机数调用生成十六进制串，替代逐字符随机选择
+    return secrets.token_hex(length // 2 + 1)[:length]
+
+@override_settings(PASSWORD_HASHERS=FAST_PASSWORD_HASHERS)
+class TestConcurrentOperations(TransactionTestCase):
+    """
+    并发操作测试
+    工作线程各自使用独立的数据库连接，TestCase 外层未提交的事务对它们不可见，
+    因此使用 TransactionTestCase 真正提交数据，每个测试结束后清空数据表
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # 线程池在整个测试类内复用，避免每个测试重复创建线程
+        cls.executor = ThreadPoolExecutor(max_workers=WORKER_COUNT)
+        # 密码只哈希一次，各测试建用户时直接写入哈希值；须在覆盖后的哈希算法生效后计算
+        cls.password_hash = make_password('testpass123')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+        super().tearDownClass()
 
-class TestConcurrentOperations(TestCase):
     def setUp(self):
         self.client = APIClient()
-        self.user = User.objects.create_user(
+        self.user = User.objects.create(
             phone_number='13800138000',
-            password='testpass123'
+            username='13800138000',
+            password=self.password_hash
         )
         self.client.force_authenticate(user=self.user)
-        self.lock = threading.Lock()
-        self.errors = []
+        # 令牌只签发一次，各工作线程复用，不必每个线程各自登录
+        self.auth_header = f'Bearer {AccessToken.for_user(self.user)}'
+        # 每个测试一份线程本地存储，池中线程在本测试内复用各自的客户端
+        self.local = threading.local()
+
+    def run_concurrently(self, request):
+        """
+        在线程池中并发执行 WORKER_COUNT 次 request，返回各次响应状态码；
+        工作线程中的异常会在读取结果时原样抛出
+        """
+        def worker(_):
+            try:
+                return request(self.get_worker_client()).status_code
+            finally:
+                # 视图自行管理事务；任务结束后关闭本线程的数据库连接，避免遗留空闲连接
+                connection.close()
+
+        return list(self.executor.map(worker, range(WORKER_COUNT)))
+
+    def get_worker_client(self):
+        """获取当前线程的客户端：APIClient 的凭据和 cookie 保存在实例上，不能跨线程共享"""
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=self.auth_header)
+            self.local.client = client
+        return client
 
     def test_concurrent_tag_creation(self):
         """测试并发创建标签"""
-        def create_tag():
-            try:
-                with transaction.atomic():
-                    response = self.client.post('/api/tags/', {
-                        'name': f'test_tag_{random_string()}'
-                    })
-                    assert response.status_code in [201, 400]
-            except Exception as e:
-                with self.lock:
-                    self.errors.append(str(e))
-
-        threads = []
-        for _ in range(10):
-            t = threading.Thread(target=create_tag)
-            threads.append(t)
-            t.start()
-
-        for t in threads:
-            t.join()
-
-        assert len(self.errors) == 0
+        def create_tag(client):
+            return client.post('/api/tags/', {
+                'tag_name': f'test_tag_{random_string()}'
+            })
+
+        status_codes = self.run_concurrently(create_tag)
+
+        assert all(code in ACCEPTED_STATUS_CODES for code in status_codes)
         assert Tag.objects.count() > 0
 
     def test_concurrent_script_creation(self):
         """测试并发创建话术"""
-        tag = Tag.objects.create(name='test_tag')
+        tag = Tag.objects.create(tag_name='test_tag')
 
-        def create_script():
-            try:
-                with transaction.atomic():
-                    response = self.client.post('/api/scripts/', {
-                        'title': f'test_script_{random_string()}',
-                        'content': f'content_{random_string()}',
-                        'tags': [tag.id]
-                    })
-                    assert response.status_code in [201, 400]
-            except Exception as e:
-                with self.lock:
-                    self.errors.append(str(e))
-
-        threads = []
-        for _ in range(10):
-            t = threading.Thread(target=create_script)
-            threads.append(t)
-            t.start()
-
-        for t in threads:
-            t.join()
-
-        assert len(self.errors) == 0
+        def create_script(client):
+            return client.post('/api/scripts/', {
+                'title': f'test_script_{random_string()}',
+                'content': f'content_{random_string()}',
+                'tags': [tag.id]
+            })
+
+        status_codes = self.run_concurrently(create_script)
+
+        assert all(code in ACCEPTED_STATUS_CODES for code in status_codes)
         assert Script.objects.count() > 0
 
     def test_concurrent_script_version(self):
@@ -87,29 +118,16 @@ class TestConcurrentOperations(TestCase):
             created_by=self.user
         )
 
-        def create_version():
-            try:
-                with transaction.atomic():
-                    response = self.client.post(
-                        f'/api/scripts/{script.id}/new_version/',
-                        {
-                            'content': f'content_{random_string()}'
-                        }
-                    )
-                    assert response.status_code in [201, 400]
-            except Exception as e:
-                with self.lock:
-                    self.errors.append(str(e))
-
-        threads = []
-        for _ in range(10):
-            t = threading.Thread(target=create_version)
-            threads.append(t)
-            t.start()
-
-        for t in threads:
-            t.join()
-
-        assert len(self.errors) == 0
+        def create_version(client):
+            return client.post(
+                f'/api/scripts/{script.id}/new_version/',
+                {
+                    'content': f'content_{random_string()}'
+                }
+            )
+
+        status_codes = self.run_concurrently(create_version)
+
+        assert all(code in ACCEPTED_STATUS_CODES for code in status_codes)
         script.refresh_from_db()
         assert Script.objects.filter(title=script.title).count() > 1 
\ No newline at end of file